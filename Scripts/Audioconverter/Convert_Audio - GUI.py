@@ -1,8 +1,12 @@
 import subprocess
 import os
 import sys
+import queue
+import shutil
+import tempfile
+import threading
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 import pyperclip
 import ctypes
 try:
@@ -10,6 +14,9 @@ try:
 except Exception:
     pass
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Scripts/, for utils
+from utils import probe_cache
+
 if len(sys.argv) > 1:
     filepath = sys.argv[1]
 else:
@@ -18,34 +25,332 @@ else:
 SUPPORTED_CODECS = ['aac', 'ac3', 'eac3']
 UNSUPPORTED_CODECS = ['truehd']
 
+VIDEO_EXTENSIONS = ('.mkv', '.mp4', '.mov')
+OUTPUT_SUFFIX = " + AC3"
+TEMP_SUFFIX = ".ac3tmp"      # unfertige Ausgabe, liegt im selben Ordner (gleiches Laufwerk -> atomares Umbenennen)
+TRASH_DIR_NAME = "_Original" # Modus "trash": Originale landen in diesem Unterordner
+FREE_SPACE_MARGIN = 512 * 1024 * 1024  # so viel muss nach der Umwandlung noch frei bleiben
+
+# Ausgabe: "copy" = neue Datei "<name> + AC3", "replace" = Original ersetzen,
+#          "trash" = Original nach TRASH_DIR_NAME verschieben und ersetzen
+OUTPUT_MODES = {"copy": "Neue Datei (+ AC3)", "replace": "Original ersetzen", "trash": f"Original nach {TRASH_DIR_NAME}"}
+OUTPUT_MODE = "copy"
+KEEP_ORIGINAL = False # Original-Tonspur zusätzlich zur AC3-Spur behalten (Startwert, in der GUI änderbar)
+PARALLEL_JOBS = 2     # ffmpeg-Jobs gleichzeitig (Startwert, in der GUI änderbar)
+WATCH_INTERVAL = 10   # Sekunden zwischen zwei Durchläufen der Ordnerüberwachung
+
 def get_audio_codecs(filepath):
-    result = subprocess.run([
-        'ffprobe', '-v', 'error',
-        '-select_streams', 'a',
-        '-show_entries', 'stream=codec_name',
-        '-of', 'default=noprint_wrappers=1:nokey=1',
-        filepath
-    ], capture_output=True, text=True)
-    return list(set(result.stdout.strip().splitlines()))
-
-def convert_to_ac3(filepath):
+    try:
+        info = probe_cache.probe(filepath)  # shared ffprobe cache
+    except (RuntimeError, OSError, ValueError):
+        return []  # ffprobe fehlgeschlagen/fehlt, Datei verschwunden oder kaputtes JSON
+    return list({s['codec_name'] for s in info.get('streams', [])
+                 if s.get('codec_type') == 'audio' and s.get('codec_name')})
+
+def needs_conversion(codecs):
+    """Nur umwandeln, wenn keine der Tonspuren abgespielt werden kann"""
+    return any(c in UNSUPPORTED_CODECS for c in codecs) and not any(c in SUPPORTED_CODECS for c in codecs)
+
+def output_path_for(filepath):
     folder, filename = os.path.split(filepath)
     name, ext = os.path.splitext(filename)
-    new_name = f"{name} + AC3{ext}"
-    output_path = os.path.join(folder, new_name)
-
-    cmd = [
-        'ffmpeg', '-i', filepath,
-        '-map', '0',
-        '-c:v', 'copy',
-        '-c:a', 'ac3',
-        '-b:a', '640k',
-        '-c:s', 'copy',
-        output_path
-    ]
-
-    subprocess.run(cmd)
-    messagebox.showinfo("Fertig", f"Konvertiert: {output_path}")
+    return os.path.join(folder, f"{name}{OUTPUT_SUFFIX}{ext}")
+
+def build_ac3_command(filepath, output_path, keep_original=False):
+    """
+    Nur Tonspuren, die nicht in SUPPORTED_CODECS stehen, werden nach AC3 umgewandelt,
+    alles andere wird kopiert. keep_original setzt die AC3-Spur direkt hinter die
+    Original-Spur, statt sie zu ersetzen.
+    """
+    cmd = ['ffmpeg', '-y', '-v', 'error', '-nostats', '-progress', 'pipe:1', '-i', filepath]
+    try:
+        streams = probe_cache.probe(filepath).get('streams', [])
+    except RuntimeError:
+        streams = []
+    if not streams:
+        # Keine Stream-Infos, wie früher alle Tonspuren umwandeln
+        return cmd + ['-map', '0', '-c:v', 'copy', '-c:a', 'ac3', '-b:a', '640k', '-c:s', 'copy', output_path]
+
+    maps, codecs = [], []
+    out = 0  # Index des Ausgabe-Streams, weicht vom Eingabe-Index ab, sobald eine Spur doppelt ist
+    for s in streams:
+        idx = s['index']
+        offending = s.get('codec_type') == 'audio' and s.get('codec_name') not in SUPPORTED_CODECS
+        if offending and keep_original:
+            maps += ['-map', f'0:{idx}']
+            out += 1
+        maps += ['-map', f'0:{idx}']
+        if offending:
+            codecs += [f'-c:{out}', 'ac3', f'-b:{out}', '640k']
+        out += 1
+    return cmd + maps + ['-c', 'copy'] + codecs + [output_path]
+
+def temp_path_for(filepath):
+    folder, filename = os.path.split(filepath)
+    name, ext = os.path.splitext(filename)
+    return os.path.join(folder, f"{name}{TEMP_SUFFIX}{ext}")
+
+def final_path_for(filepath, mode):
+    return output_path_for(filepath) if mode == "copy" else filepath
+
+def expected_stream_count(cmd):
+    """Anzahl der Ausgabe-Streams eines build_ac3_command-Befehls (None beim Notfall mit -map 0)"""
+    maps = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-map']
+    return None if maps == ['0'] else len(maps)
+
+def estimate_output_size(filepath, keep_original=False):
+    """Größe der Quelle + neue AC3-Spuren - ersetzte Spuren (wenn deren Bitrate bekannt ist)"""
+    size = os.path.getsize(filepath)
+    try:
+        info = probe_cache.probe(filepath)
+    except RuntimeError:
+        return size
+    duration = float(info.get('format', {}).get('duration') or 0)
+    for s in info.get('streams', []):
+        if s.get('codec_type') != 'audio' or s.get('codec_name') in SUPPORTED_CODECS:
+            continue
+        size += int(640000 * duration / 8)
+        if not keep_original:
+            tags = s.get('tags') or {}
+            rate = s.get('bit_rate') or tags.get('BPS') or tags.get('BPS-eng')
+            if rate and str(rate).isdigit():
+                size -= int(int(rate) * duration / 8)
+    return max(size, 0)
+
+# Speicherplatz, den laufende Jobs schon eingeplant haben: {st_dev: bytes}
+reserved = {}
+reserved_lock = threading.Lock()
+
+def reserve_space(folder, needed):
+    """Preflight: True + reserviert, wenn auf dem Laufwerk genug Platz für needed ist"""
+    dev = os.stat(folder).st_dev
+    with reserved_lock:
+        free = shutil.disk_usage(folder).free - reserved.get(dev, 0)
+        if free - needed < FREE_SPACE_MARGIN:
+            return None, free
+        reserved[dev] = reserved.get(dev, 0) + needed
+    return dev, free
+
+def release_space(dev, needed):
+    with reserved_lock:
+        reserved[dev] -= needed
+
+def verify_output(source, output, expected_streams):
+    """Anzahl der Streams und Dauer der neuen Datei müssen passen, gibt einen Fehlertext oder None zurück"""
+    try:
+        src = probe_cache.probe(source)
+        out = probe_cache.probe(output)
+    except RuntimeError as e:
+        return f"Prüfung fehlgeschlagen: {e}"
+    finally:
+        probe_cache.forget(output)  # temporäre Datei, kein Cache-Eintrag
+    if expected_streams is not None and len(out.get('streams', [])) != expected_streams:
+        return f"Prüfung: {len(out.get('streams', []))} statt {expected_streams} Streams"
+    src_duration = float(src.get('format', {}).get('duration') or 0)
+    out_duration = float(out.get('format', {}).get('duration') or 0)
+    if abs(src_duration - out_duration) > max(1.0, src_duration * 0.01):
+        return f"Prüfung: Dauer {out_duration:.1f}s statt {src_duration:.1f}s"
+    return None
+
+def finish_output(source, temp_path, mode):
+    """Geprüfte temporäre Datei an ihren Platz verschieben (os.replace ist auf demselben Laufwerk atomar)"""
+    if mode == "copy":
+        os.replace(temp_path, output_path_for(source))
+    elif mode == "replace":
+        os.replace(temp_path, source)
+    else:
+        trash = os.path.join(os.path.dirname(source), TRASH_DIR_NAME)
+        os.makedirs(trash, exist_ok=True)
+        trashed = os.path.join(trash, os.path.basename(source))
+        os.replace(source, trashed)
+        try:
+            os.replace(temp_path, source)
+        except OSError:
+            os.replace(trashed, source)  # Original zurücklegen
+            raise
+
+def get_duration(filepath):
+    try:
+        return float(probe_cache.probe(filepath).get('format', {}).get('duration') or 0)
+    except (RuntimeError, ValueError):
+        return 0.0
+
+# --- JOB QUEUE ---
+# Jobs laufen in Worker-Threads, die GUI wird nur im Tk-Thread über job_updates aktualisiert.
+jobs = {}                # filepath -> {'item', 'status', 'output', 'notify', 'keep', 'mode'}
+pending = []             # filepaths in Warteschlange
+running = set()
+job_updates = queue.Queue()  # (aktion, filepath, wert)
+
+def convert_to_ac3(filepath, notify=True):
+    """Datei in die Warteschlange stellen. notify=True zeigt am Ende ein Fenster (manuelle Umwandlung)."""
+    if filepath in jobs and jobs[filepath]['status'] in ('Wartet', 'Läuft', 'Fertig'):
+        return
+    mode = output_mode.get()
+    output_path = final_path_for(filepath, mode)
+    item = jobs[filepath]['item'] if filepath in jobs else queue_view.insert(
+        '', tk.END, values=(os.path.basename(filepath), 'Wartet', ''))
+    queue_view.item(item, values=(os.path.basename(filepath), 'Wartet', ''))
+    jobs[filepath] = {'item': item, 'status': 'Wartet', 'output': output_path, 'notify': notify,
+                      'keep': keep_original.get(), 'mode': mode}
+    pending.append(filepath)
+    dispatch_jobs()
+
+def job_limit():
+    try:
+        return max(parallel_jobs.get(), 1)
+    except tk.TclError:  # Spinbox gerade leer / ungültig
+        return PARALLEL_JOBS
+
+def dispatch_jobs():
+    while pending and len(running) < job_limit():
+        path = pending.pop(0)
+        running.add(path)
+        set_job_status(path, 'Läuft', '0%')
+        threading.Thread(target=run_job, args=(path, jobs[path]['keep'], jobs[path]['mode']), daemon=True).start()
+
+def run_job(filepath, keep_original=False, mode="copy"):
+    """
+    Worker: Platz prüfen, ffmpeg in eine temporäre Datei neben der Quelle (Fortschritt
+    über job_updates), Ergebnis prüfen und dann je nach mode an ihren Platz verschieben.
+    """
+    temp_path = temp_path_for(filepath)
+    dev = None  # gesetzt, sobald Platz reserviert ist
+    error = None
+    try:
+        cmd = build_ac3_command(filepath, temp_path, keep_original)
+        needed = estimate_output_size(filepath, keep_original)
+        dev, free = reserve_space(os.path.dirname(filepath) or '.', needed)
+        if dev is None:
+            job_updates.put(('done', filepath, f"Zu wenig Speicherplatz: braucht ~{needed / 1024**3:.1f} GB, "
+                                               f"frei {free / 1024**3:.1f} GB"))
+            return
+
+        duration = get_duration(filepath)
+        last = -1
+        with tempfile.TemporaryFile(mode='w+', encoding='utf-8', errors='replace') as errlog:
+            proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=errlog, text=True)
+            jobs[filepath]['proc'] = proc
+            for line in proc.stdout:
+                key, _, value = line.strip().partition('=')
+                if key == 'out_time_us' and duration and value.isdigit():
+                    percent = min(int(int(value) / 1e6 / duration * 100), 100)
+                    if percent != last:
+                        last = percent
+                        job_updates.put(('progress', filepath, f"{percent}%"))
+            returncode = proc.wait()
+            errlog.seek(0)
+            error = None
+            if returncode != 0:
+                error = errlog.read().strip() or "ffmpeg fehlgeschlagen"
+
+        if error is None:
+            error = verify_output(filepath, temp_path, expected_stream_count(cmd))
+        if error is None:
+            try:
+                finish_output(filepath, temp_path, mode)
+            except OSError as e:
+                error = f"Ersetzen fehlgeschlagen: {e}"
+    except Exception as e:
+        # Jeder Fehler (z.B. ffmpeg fehlt, Datei verschwunden) muss als 'done' ankommen,
+        # sonst bleibt der Job auf "Läuft" und belegt für immer einen Platz in running
+        error = str(e) or type(e).__name__
+    finally:
+        if dev is not None:
+            release_space(dev, needed)
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    job_updates.put(('done', filepath, error))
+
+def set_job_status(filepath, status, progress=''):
+    job = jobs[filepath]
+    job['status'] = status
+    queue_view.item(job['item'], values=(os.path.basename(filepath), status, progress))
+
+def poll_jobs():
+    try:
+        while True:
+            action, path, value = job_updates.get_nowait()
+            if action == 'progress':
+                set_job_status(path, 'Läuft', value)
+            elif action == 'enqueue':
+                convert_to_ac3(path, notify=False)
+            elif action == 'done':
+                running.discard(path)
+                if value is None:
+                    set_job_status(path, 'Fertig', '100%')
+                    if jobs[path]['notify']:
+                        messagebox.showinfo("Fertig", f"Konvertiert: {jobs[path]['output']}")
+                else:
+                    set_job_status(path, 'Fehler', value.splitlines()[-1] if value else '')
+            elif action == 'watch':
+                watch_label.config(text=value)
+    except queue.Empty:
+        pass
+    dispatch_jobs()
+    root.after(200, poll_jobs)
+
+# --- FOLDER WATCH ---
+watch_stop = None
+
+def watch_folder(folder, stop):
+    """
+    Durchsucht folder alle WATCH_INTERVAL Sekunden. Eine Datei wird erst geprüft, wenn
+    ihre Größe zwischen zwei Durchläufen gleich geblieben ist (Download fertig).
+    """
+    sizes = {}
+    handled = set()
+    while not stop.is_set():
+        try:
+            entries = [e for e in os.scandir(folder) if e.is_file()]
+        except OSError as e:
+            job_updates.put(('watch', None, f"Überwachung: {e}"))
+            entries = []
+        for entry in entries:
+            name, ext = os.path.splitext(entry.name)
+            if (entry.path in handled or ext.lower() not in VIDEO_EXTENSIONS
+                    or name.endswith((OUTPUT_SUFFIX, TEMP_SUFFIX))):
+                continue
+            size = entry.stat().st_size
+            if sizes.get(entry.path) != size:
+                sizes[entry.path] = size  # neu oder wächst noch
+                continue
+            handled.add(entry.path)
+            if os.path.exists(output_path_for(entry.path)) or os.path.exists(temp_path_for(entry.path)):
+                continue
+            if needs_conversion(get_audio_codecs(entry.path)):
+                job_updates.put(('enqueue', entry.path, None))
+        stop.wait(WATCH_INTERVAL)
+
+def toggle_watch():
+    global watch_stop
+    if watch_stop:
+        watch_stop.set()
+        watch_stop = None
+        watch_btn.config(text="👁 Ordner überwachen")
+        watch_label.config(text="Überwachung aus")
+        return
+    folder = filedialog.askdirectory()
+    if not folder:
+        return
+    watch_stop = threading.Event()
+    threading.Thread(target=watch_folder, args=(folder, watch_stop), daemon=True).start()
+    watch_btn.config(text="⏹ Überwachung stoppen")
+    watch_label.config(text=f"Überwacht: {folder}")
+
+def on_close():
+    if running and not messagebox.askyesno("Beenden", f"{len(running)} Umwandlung(en) laufen noch. Abbrechen und beenden?"):
+        return
+    if watch_stop:
+        watch_stop.set()
+    for path in running:
+        proc = jobs[path].get('proc')
+        if proc and proc.poll() is None:
+            proc.terminate()
+    root.destroy()
 
 def update_codec_display(codecs, filepath):
     codec_display.config(state='normal')
@@ -85,10 +390,24 @@ def handle_file(path):
     codecs = get_audio_codecs(path)
     update_codec_display(codecs, path)
 
+def handle_files(paths):
+    """Mehrere Dateien: alle mit nicht unterstützten Tonspuren nach einer Rückfrage einreihen"""
+    paths = [p for p in paths if os.path.isfile(p)]
+    if len(paths) == 1:
+        handle_file(paths[0])
+        return
+    todo = [p for p in paths if needs_conversion(get_audio_codecs(p))]
+    if not todo:
+        messagebox.showinfo("Info", "Keine der Dateien muss umgewandelt werden.")
+        return
+    if messagebox.askyesno("Frage", f"{len(todo)} von {len(paths)} Dateien in AC3 umwandeln?"):
+        for p in todo:
+            convert_to_ac3(p, notify=False)
+
 def browse_file():
-    file_path = filedialog.askopenfilename(filetypes=[("Video Files", "*.mkv *.mp4 *.mov")])
-    if file_path:
-        handle_file(file_path)
+    file_paths = filedialog.askopenfilenames(filetypes=[("Video Files", "*.mkv *.mp4 *.mov")])
+    if file_paths:
+        handle_files(list(file_paths))
 
 def paste_clipboard():
     clip = pyperclip.paste()
@@ -98,7 +417,7 @@ def paste_clipboard():
         handle_file(clip)
 
 def on_drop(event):
-    handle_file(event.data)
+    handle_files(list(root.tk.splitlist(event.data)))
 
 # --- GUI SETUP ---
 try:
@@ -110,7 +429,7 @@ except ImportError:
 root = tkdnd.TkinterDnD.Tk()
 root.title("🎬 AC3 Audio-Konverter")
 root.configure(bg="#1e1e1e")
-root.geometry("900x600")
+root.geometry("900x700")
 
 font_style = ("Segoe UI", 10)
 btn_style = {"font": font_style, "bg": "#333", "fg": "white", "activebackground": "#555", "activeforeground": "white"}
@@ -124,7 +443,7 @@ entry.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
 tk.Button(frame, text="📂 Durchsuchen", command=browse_file, **btn_style).grid(row=1, column=0, padx=5, pady=5, sticky="ew")
 tk.Button(frame, text="📋 Aus Zwischenablage", command=paste_clipboard, **btn_style).grid(row=1, column=1, padx=5, pady=5, sticky="ew")
 
-drop_label = tk.Label(root, text="🎞️ Datei hierher ziehen", font=font_style,
+drop_label = tk.Label(root, text="🎞️ Datei(en) hierher ziehen", font=font_style,
                       relief="groove", width=60, height=7, bg="#2a2a2a", fg="#cccccc")
 drop_label.pack(padx=10, pady=5, fill='x')
 drop_label.drop_target_register(tkdnd.DND_FILES)
@@ -139,7 +458,48 @@ codec_display.tag_config('red', foreground='tomato')
 codec_display.tag_config('orange', foreground='orange')
 codec_display.pack(padx=10, pady=10, fill='both')
 
+# Warteschlange + Ordnerüberwachung
+queue_frame = tk.Frame(root, bg="#1e1e1e")
+queue_frame.pack(padx=10, pady=5, fill='both', expand=True)
+
+controls = tk.Frame(queue_frame, bg="#1e1e1e")
+controls.pack(fill='x')
+tk.Label(controls, text="Parallele Jobs:", font=font_style, bg="#1e1e1e", fg="#cccccc").pack(side='left', padx=5)
+parallel_jobs = tk.IntVar(value=PARALLEL_JOBS)
+tk.Spinbox(controls, from_=1, to=8, width=3, textvariable=parallel_jobs, font=font_style,
+           bg="#2a2a2a", fg="white", buttonbackground="#333").pack(side='left', padx=5)
+keep_original = tk.BooleanVar(value=KEEP_ORIGINAL)
+tk.Checkbutton(controls, text="Original-Tonspur behalten", variable=keep_original, font=font_style,
+               bg="#1e1e1e", fg="#cccccc", selectcolor="#2a2a2a", activebackground="#1e1e1e",
+               activeforeground="white").pack(side='left', padx=5)
+tk.Label(controls, text="Ausgabe:", font=font_style, bg="#1e1e1e", fg="#cccccc").pack(side='left', padx=5)
+output_mode = tk.StringVar(value=OUTPUT_MODE)
+mode_box = ttk.Combobox(controls, values=list(OUTPUT_MODES.values()), state='readonly', width=22, font=font_style)
+mode_box.set(OUTPUT_MODES[OUTPUT_MODE])
+mode_box.bind('<<ComboboxSelected>>',
+              lambda e: output_mode.set(next(k for k, v in OUTPUT_MODES.items() if v == mode_box.get())))
+mode_box.pack(side='left', padx=5)
+watch_btn = tk.Button(controls, text="👁 Ordner überwachen", command=toggle_watch, **btn_style)
+watch_btn.pack(side='left', padx=5)
+watch_label = tk.Label(controls, text="Überwachung aus", font=font_style, bg="#1e1e1e", fg="#cccccc")
+watch_label.pack(side='left', padx=5)
+
+style = ttk.Style(root)
+style.theme_use('default')
+style.configure("Treeview", background="#2a2a2a", fieldbackground="#2a2a2a", foreground="white", font=font_style)
+style.configure("Treeview.Heading", background="#333", foreground="white", font=font_style)
+queue_view = ttk.Treeview(queue_frame, columns=('file', 'status', 'progress'), show='headings', height=8)
+queue_view.heading('file', text='Datei')
+queue_view.heading('status', text='Status')
+queue_view.heading('progress', text='Fortschritt')
+queue_view.column('file', width=560)
+queue_view.column('status', width=100)
+queue_view.column('progress', width=180)
+queue_view.pack(fill='both', expand=True, pady=5)
+
 if filepath and os.path.isfile(filepath):
     handle_file(filepath)
-    
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+root.after(200, poll_jobs)
 root.mainloop()
@@ -5,6 +5,7 @@ import shutil
 import subprocess
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 from PySide6.QtWidgets import (
@@ -16,6 +17,9 @@ from PySide6.QtCore import Qt, QTimer
 CONFIG_FILE = "backup_config.json"
 LAST_BACKUP_FILE = "last_backup.json"
 LOG_FILE = "backup_errors.log"
+MANIFEST_FILE = "backup_manifest.json"  # per job: {relative path: [size, mtime_ns]} of the files synced so far
+COPY_WORKERS = 8                        # parallel copies, mostly helps with many small files
+SKIP_DIRS = {".git"}                    # never copied, the backup folder has its own repo
 
 # ---------- Helper Functions ----------
 def log_error(message: str):
@@ -60,6 +64,109 @@ def save_last_backup_time(job_name):
     except Exception as e:
         log_error(f"Error saving last backup time: {e}")
 
+def load_manifest(job_name):
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get(job_name, {})
+    except Exception as e:
+        log_error(f"Error reading manifest file: {e}")
+        return {}
+
+def save_manifest(job_name, manifest):
+    manifests = {}
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+                manifests = json.load(f)
+        except Exception as e:
+            log_error(f"Error reading manifest file: {e}")
+    manifests[job_name] = manifest
+    try:
+        with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifests, f)
+    except Exception as e:
+        log_error(f"Error saving manifest: {e}")
+
+# ---------- Incremental Sync ----------
+def _path(root, rel):
+    return os.path.join(root, *rel.split("/"))
+
+def scan_tree(root):
+    """{relative path (with /): [size, mtime_ns]} of all files below root.
+    Raises OSError if a folder can't be read, so missing files are never mistaken for deletions."""
+    files = {}
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(_path(root, rel_dir) if rel_dir else root) as entries:
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        stack.append(rel)
+                elif entry.is_file():
+                    st = entry.stat()
+                    files[rel] = [st.st_size, st.st_mtime_ns]
+    return files
+
+def plan_sync(source, backup, manifest):
+    """Compare the source with the manifest. Returns (current files, files to copy, files to delete)"""
+    current = scan_tree(source)
+    to_copy = []
+    for rel, stat in current.items():
+        if manifest.get(rel) == stat and os.path.exists(_path(backup, rel)):
+            continue
+        try:
+            st = os.stat(_path(backup, rel))
+            if [st.st_size, st.st_mtime_ns] == stat:
+                continue  # already there (copy2 keeps mtime), e.g. first run on an existing backup
+        except OSError:
+            pass
+        to_copy.append(rel)
+    # On Windows "A.txt" -> "a.txt" is the same file in the backup, deleting the old
+    # name would delete the only copy. Only paths that are gone in any spelling are deleted.
+    current_keys = {os.path.normcase(rel) for rel in current}
+    to_delete = [rel for rel in manifest if rel not in current and os.path.normcase(rel) not in current_keys]
+    return current, to_copy, to_delete
+
+def copy_files(source, backup, rel_paths):
+    """Copy rel_paths with COPY_WORKERS threads. Returns {relative path: error} of the failed ones"""
+    def copy_one(rel):
+        dst = _path(backup, rel)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copy2(_path(source, rel), dst)
+
+    errors = {}
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        futures = {pool.submit(copy_one, rel): rel for rel in rel_paths}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+    return errors
+
+def delete_files(backup, rel_paths):
+    """Remove files that are gone from the source (and folders left empty). Returns {relative path: error}"""
+    errors = {}
+    for rel in rel_paths:
+        try:
+            if os.path.lexists(_path(backup, rel)):
+                os.remove(_path(backup, rel))
+        except OSError as e:
+            errors[rel] = e
+            continue
+        rel_dir = rel.rpartition("/")[0]
+        while rel_dir:
+            try:
+                os.rmdir(_path(backup, rel_dir))
+            except OSError:
+                break  # not empty
+            rel_dir = rel_dir.rpartition("/")[0]
+    return errors
+
 def init_git_repo(backup_folder: str, remote_repo: str = None):
     if not os.path.exists(os.path.join(backup_folder, ".git")):
         try:
@@ -86,24 +193,41 @@ def perform_backup_job(job):
     os.makedirs(backup, exist_ok=True)
     init_git_repo(backup, remote)
 
+    # Only files whose size or mtime changed since the last run are copied; files
+    # that disappeared from the source are removed from the backup as well.
+    manifest = load_manifest(name)
     try:
-        for item in os.listdir(source):
-            s_path = os.path.join(source, item)
-            d_path = os.path.join(backup, item)
-            if os.path.isdir(s_path):
-                shutil.copytree(s_path, d_path, dirs_exist_ok=True)
-            else:
-                shutil.copy2(s_path, d_path)
-    except Exception as e:
-        log_error(f"Job {name}: Error copying files: {e}")
+        current, to_copy, to_delete = plan_sync(source, backup, manifest)
+    except OSError as e:
+        log_error(f"Job {name}: Error scanning source: {e}")
         return False
 
+    # Deletions first, so nothing removed can ever hit a file that was just copied
+    delete_errors = delete_files(backup, to_delete)
+    copy_errors = copy_files(source, backup, to_copy)
+    for rel, e in {**copy_errors, **delete_errors}.items():
+        log_error(f"Job {name}: Error syncing {rel}: {e}")
+
+    # Failed files keep their old entry, so they are tried again next time
+    synced = {rel: stat for rel, stat in current.items() if rel not in copy_errors}
+    for rel in copy_errors:
+        if rel in manifest:
+            synced[rel] = manifest[rel]
+    for rel in delete_errors:
+        synced[rel] = manifest[rel]
+    save_manifest(name, synced)
+
     try:
-        subprocess.run(["git", "add", "."], cwd=backup, check=True)
-        commit_message = f"Auto backup {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        subprocess.run(["git", "commit", "-m", commit_message], cwd=backup, check=True)
-        if remote:
-            subprocess.run(["git", "push", "-u", "origin", "master"], cwd=backup, check=True)
+        # Untouched files keep their stat data in the index, so git only hashes what was copied
+        subprocess.run(["git", "add", "-A"], cwd=backup, check=True)
+        staged = subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=backup).returncode != 0
+        if staged:
+            commit_message = f"Auto backup {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            subprocess.run(["git", "commit", "-m", commit_message], cwd=backup, check=True)
+            if remote:
+                subprocess.run(["git", "push", "-u", "origin", "master"], cwd=backup, check=True)
+        if copy_errors or delete_errors:
+            return False
         save_last_backup_time(name)
         return True
     except subprocess.CalledProcessError as e:
@@ -1,12 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import numpy as np
-import sympy as sp
-from matplotlib.colors import Normalize
-from matplotlib.cm import ScalarMappable
+
+from richtungsfeld_core import compile_function, style_plot, draw_direction_field
+
 
 class DirectionFieldPlotter:
     def __init__(self, root):
@@ -199,8 +198,6 @@ class DirectionFieldPlotter:
             button_fg = "#ffffff"
             button_hover = "#14a0a6"
             self.theme_button.config(text="☀️")
-            plot_bg = "#2d2d2d"
-            plot_fg = "#e0e0e0"
         else:
             # Light mode colors
             bg = "#f5f5f5"
@@ -212,8 +209,6 @@ class DirectionFieldPlotter:
             button_fg = "#ffffff"
             button_hover = "#14a0a6"
             self.theme_button.config(text="🌙")
-            plot_bg = "#ffffff"
-            plot_fg = "#333333"
         
         # Apply to root and main widgets
         self.root.config(bg=bg)
@@ -257,79 +252,19 @@ class DirectionFieldPlotter:
         self.theme_button.config(bg=card_bg, fg=fg, activebackground=entry_bg)
         
         # Apply to matplotlib
-        self.fig.patch.set_facecolor(plot_bg)
-        self.ax.set_facecolor(plot_bg)
-        self.ax.tick_params(colors=plot_fg)
-        self.ax.xaxis.label.set_color(plot_fg)
-        self.ax.yaxis.label.set_color(plot_fg)
-        self.ax.title.set_color(plot_fg)
-        for spine in self.ax.spines.values():
-            spine.set_edgecolor(plot_fg)
+        style_plot(self.fig, self.ax, self.dark_mode)
         
         self.canvas.draw()
     
     def parse_function(self, func_str):
         """Parse and convert function to y' = ... form, handling various input formats"""
-        x, y = sp.symbols('x y')
-        y_prime = sp.Symbol("y'")
+        func, expr = compile_function(func_str)
         
-        func_str = func_str.strip()
+        # Convert to string for display
+        converted_str = f"y' = {expr}"
+        self.converted_label.config(text=f"Umgeformt: {converted_str}")
         
-        try:
-            # Replace ^ with ** for exponentiation
-            func_str = func_str.replace("^", "**")
-            
-            # Replace common derivative notations
-            func_str = func_str.replace("y'", "yprime")
-            func_str = func_str.replace("dy/dx", "yprime")
-            func_str = func_str.replace("dy", "yprime")
-            
-            # Add support for e and pi
-            func_str = func_str.replace("pi", "PI")
-            
-            yprime = sp.Symbol('yprime')
-            PI = sp.pi
-            e = sp.E
-            
-            # Define log function for custom base support
-            def log(base, value):
-                return sp.log(value, base)
-            
-            # Parse the expression
-            if "=" in func_str:
-                left, right = func_str.split("=", 1)
-                left_expr = sp.sympify(left.strip())
-                right_expr = sp.sympify(right.strip())
-                equation = sp.Eq(left_expr, right_expr)
-                
-                # Solve for y'
-                solution = sp.solve(equation, yprime)
-                if solution:
-                    expr = solution[0]
-                else:
-                    raise ValueError("Konnte nicht nach y' auflösen")
-            else:
-                # Assume it's already in the form y' = expression
-                expr = sp.sympify(func_str)
-            
-            # Convert to string for display
-            converted_str = f"y' = {expr}"
-            self.converted_label.config(text=f"Umgeformt: {converted_str}")
-            
-            # Return lambda function - ensure it returns float/numpy array
-            func = sp.lambdify((x, y), expr, modules=['numpy'])
-
-            
-            # Wrapper to ensure output is float
-            def safe_func(x_val, y_val):
-                result = np.array(func(x_val, y_val), dtype=float)
-                return result
-
-            
-            return safe_func
-            
-        except Exception as e:
-            raise ValueError(f"Konnte Funktion nicht parsen: {str(e)}")
+        return func
     
     def update_plot(self):
         """Update plot with current parameters"""
@@ -357,64 +292,10 @@ class DirectionFieldPlotter:
         
         try:
             func = self.parse_function(self.function_str)
-            
-            # Create grid
-            x = np.linspace(self.x_min, self.x_max, self.x_steps)
-            y = np.linspace(self.y_min, self.y_max, self.y_steps)
-            X, Y = np.meshgrid(x, y)
-            
-            # Calculate slopes
-            with np.errstate(divide='ignore', invalid='ignore'):
-                slopes = func(X, Y)
-            
-            # Ensure slopes is float array
-            slopes = np.asarray(slopes, dtype=np.float64)
-            
-            # Normalize slopes for color mapping
-            slopes_flat = slopes.flatten()
-            valid_slopes = slopes_flat[np.isfinite(slopes_flat)]
-            
-            if len(valid_slopes) > 0:
-                norm = Normalize(vmin=np.percentile(valid_slopes, 5), 
-                               vmax=np.percentile(valid_slopes, 95))
-                cmap = plt.cm.RdYlBu_r
-                sm = ScalarMappable(norm=norm, cmap=cmap)
-                
-                # Calculate direction vectors
-                dx = 1
-                dy = slopes
-                
-                # Normalize vector lengths
-                magnitude = np.sqrt(dx**2 + dy**2)
-                with np.errstate(divide='ignore', invalid='ignore'):
-                    dx = dx / magnitude * 0.3
-                    dy = dy / magnitude * 0.3
-                
-                # Plot each arrow with color based on slope
-                for i in range(X.shape[0]):
-                    for j in range(X.shape[1]):
-                        if np.isfinite(slopes[i, j]):
-                            color = cmap(norm(slopes[i, j]))
-                            self.ax.arrow(X[i, j], Y[i, j], dx[i, j], dy[i, j],
-                                        head_width=0.15, head_length=0.15,
-                                        fc=color, ec=color, alpha=0.7,
-                                        length_includes_head=True)
-                
-                # Add colorbar (store reference to remove later)
-                self.colorbar = self.fig.colorbar(sm, ax=self.ax)
-                self.colorbar.set_label('Steigung', rotation=270, labelpad=20)
-                
-                if self.dark_mode:
-                    self.colorbar.ax.yaxis.label.set_color('#e0e0e0')
-                    self.colorbar.ax.tick_params(colors='#e0e0e0')
-            
-            self.ax.set_xlabel('x')
-            self.ax.set_ylabel('y')
-            self.ax.set_title('Richtungsfeld')
-            self.ax.grid(True, alpha=0.3)
-            self.ax.set_xlim(self.x_min, self.x_max)
-            self.ax.set_ylim(self.y_min, self.y_max)
-           
+            self.colorbar = draw_direction_field(
+                self.fig, self.ax, func,
+                self.x_min, self.x_max, self.y_min, self.y_max,
+                self.x_steps, self.y_steps, dark_mode=self.dark_mode)
             
         except Exception as e:
             self.show_error(f"Fehler beim Plotten: {str(e)}")
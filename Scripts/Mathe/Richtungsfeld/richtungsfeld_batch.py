@@ -0,0 +1,127 @@
+"""Headless batch renderer for direction fields.
+
+Reads a JSON file with a list of equations/ranges and renders every entry
+to PNG/SVG without opening a window, e.g.:
+
+    [
+        {"function": "x + y"},
+        {"function": "y' = x*y", "x_min": -3, "x_max": 3, "name": "xy"},
+        {"function": "dy/dx = sin(x) - y", "x_steps": 30, "dark_mode": true}
+    ]
+
+Missing keys fall back to the defaults of the GUI (-5..5, 20 steps).
+
+Usage:
+    python richtungsfeld_batch.py aufgaben.json -o bilder --format svg -j 8
+"""
+import matplotlib
+matplotlib.use("Agg")
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from richtungsfeld_core import compile_function, draw_direction_field, style_plot
+
+DEFAULTS = {
+    "x_min": -5,
+    "x_max": 5,
+    "y_min": -5,
+    "y_max": 5,
+    "x_steps": 20,
+    "y_steps": 20,
+    "dark_mode": False,
+}
+
+
+def load_jobs(path):
+    """Load the equation file and fill in defaults for missing values"""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    jobs = []
+    for i, entry in enumerate(entries, start=1):
+        if isinstance(entry, str):
+            entry = {"function": entry}
+        if "function" not in entry:
+            raise ValueError(f"Eintrag {i}: 'function' fehlt")
+
+        job = dict(DEFAULTS)
+        job.update(entry)
+        job.setdefault("name", f"{i:03d}_{slugify(job['function'])}")
+        jobs.append(job)
+    return jobs
+
+
+def slugify(text):
+    """Turn an equation into something usable as a file name"""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")
+    return slug[:40] or "feld"
+
+
+def render(job, output_dir, fmt="png", dpi=120):
+    """Render a single direction field to output_dir. Runs inside a worker process."""
+    # compile_function is cached per process: a worker that gets an equation again doesn't parse it again
+    func, expr = compile_function(job["function"])
+
+    fig = Figure(figsize=(12, 7))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    style_plot(fig, ax, job["dark_mode"])
+
+    draw_direction_field(fig, ax, func,
+                         float(job["x_min"]), float(job["x_max"]),
+                         float(job["y_min"]), float(job["y_max"]),
+                         int(job["x_steps"]), int(job["y_steps"]),
+                         dark_mode=job["dark_mode"])
+    ax.set_title(f"Richtungsfeld: y' = {expr}")
+
+    out_path = os.path.join(output_dir, f"{job['name']}.{fmt}")
+    fig.savefig(out_path, format=fmt, dpi=dpi, facecolor=fig.get_facecolor())
+    return out_path
+
+
+def render_all(jobs, output_dir, fmt="png", dpi=120, workers=None):
+    """Render all jobs in a process pool. Returns (ok_paths, errors)"""
+    os.makedirs(output_dir, exist_ok=True)
+
+    ok, errors = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render, job, output_dir, fmt, dpi): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                path = future.result()
+                ok.append(path)
+                print(f"[OK]     {path}")
+            except Exception as e:
+                errors.append((job, str(e)))
+                print(f"[FEHLER] {job['name']}: {e}")
+    return ok, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Richtungsfelder ohne GUI als Bilder rendern")
+    parser.add_argument("input", help="JSON-Datei mit Gleichungen und Bereichen")
+    parser.add_argument("-o", "--output", default="richtungsfelder", help="Ausgabeordner")
+    parser.add_argument("-f", "--format", default="png", choices=["png", "svg", "pdf"])
+    parser.add_argument("--dpi", type=int, default=120)
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Anzahl Prozesse (Standard: alle CPU-Kerne)")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.input)
+    ok, errors = render_all(jobs, args.output, args.format, args.dpi, args.jobs)
+
+    print(f"\nFertig: {len(ok)} Bilder, {len(errors)} Fehler -> {os.path.abspath(args.output)}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Direction field math and drawing without any GUI imports.
+
+Used by the Tk plotter (richtungsfeld.py) and the headless batch renderer
+(richtungsfeld_batch.py), so the batch tool runs without Tk.
+"""
+from functools import lru_cache
+
+import matplotlib
+import numpy as np
+import sympy as sp
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+
+
+@lru_cache(maxsize=128)
+def compile_function(func_str):
+    """Parse func_str and convert it to y' = ... form.
+
+    Returns (numpy function, sympy expression). Results are cached per
+    process, so the same equation is only parsed and lambdified once.
+    """
+    x, y = sp.symbols('x y')
+    
+    func_str = func_str.strip()
+    
+    try:
+        # Replace ^ with ** for exponentiation
+        func_str = func_str.replace("^", "**")
+        
+        # Replace common derivative notations
+        func_str = func_str.replace("y'", "yprime")
+        func_str = func_str.replace("dy/dx", "yprime")
+        func_str = func_str.replace("dy", "yprime")
+        
+        # Add support for e and pi
+        func_str = func_str.replace("pi", "PI")
+        
+        yprime = sp.Symbol('yprime')
+        PI = sp.pi
+        e = sp.E
+        
+        # Define log function for custom base support
+        def log(base, value):
+            return sp.log(value, base)
+        
+        # Parse the expression
+        if "=" in func_str:
+            left, right = func_str.split("=", 1)
+            left_expr = sp.sympify(left.strip())
+            right_expr = sp.sympify(right.strip())
+            equation = sp.Eq(left_expr, right_expr)
+            
+            # Solve for y'
+            solution = sp.solve(equation, yprime)
+            if solution:
+                expr = solution[0]
+            else:
+                raise ValueError("Konnte nicht nach y' auflösen")
+        else:
+            # Assume it's already in the form y' = expression
+            expr = sp.sympify(func_str)
+        
+        # Return lambda function - ensure it returns float/numpy array
+        func = sp.lambdify((x, y), expr, modules=['numpy'])
+
+        
+        # Wrapper to ensure output is float
+        def safe_func(x_val, y_val):
+            result = np.array(func(x_val, y_val), dtype=float)
+            return result
+
+        
+        return safe_func, expr
+        
+    except Exception as e:
+        raise ValueError(f"Konnte Funktion nicht parsen: {str(e)}")
+
+
+def style_plot(fig, ax, dark_mode):
+    """Apply light/dark colors to a matplotlib figure and axes"""
+    plot_bg = "#2d2d2d" if dark_mode else "#ffffff"
+    plot_fg = "#e0e0e0" if dark_mode else "#333333"
+    
+    fig.patch.set_facecolor(plot_bg)
+    ax.set_facecolor(plot_bg)
+    ax.tick_params(colors=plot_fg)
+    ax.xaxis.label.set_color(plot_fg)
+    ax.yaxis.label.set_color(plot_fg)
+    ax.title.set_color(plot_fg)
+    for spine in ax.spines.values():
+        spine.set_edgecolor(plot_fg)
+
+
+def draw_direction_field(fig, ax, func, x_min, x_max, y_min, y_max,
+                         x_steps, y_steps, dark_mode=False):
+    """Draw the direction field of func onto ax. Returns the colorbar (or None)"""
+    colorbar = None
+    
+    # Create grid
+    x = np.linspace(x_min, x_max, x_steps)
+    y = np.linspace(y_min, y_max, y_steps)
+    X, Y = np.meshgrid(x, y)
+    
+    # Calculate slopes
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = func(X, Y)
+    
+    # Ensure slopes is float array (constant functions return a scalar)
+    slopes = np.broadcast_to(np.asarray(slopes, dtype=np.float64), X.shape)
+    
+    # Normalize slopes for color mapping
+    slopes_flat = slopes.flatten()
+    valid_slopes = slopes_flat[np.isfinite(slopes_flat)]
+    
+    if len(valid_slopes) > 0:
+        norm = Normalize(vmin=np.percentile(valid_slopes, 5), 
+                       vmax=np.percentile(valid_slopes, 95))
+        cmap = matplotlib.colormaps["RdYlBu_r"]
+        sm = ScalarMappable(norm=norm, cmap=cmap)
+        
+        # Calculate direction vectors
+        dx = 1
+        dy = slopes
+        
+        # Normalize vector lengths
+        magnitude = np.sqrt(dx**2 + dy**2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dx = dx / magnitude * 0.3
+            dy = dy / magnitude * 0.3
+        
+        # Plot each arrow with color based on slope
+        for i in range(X.shape[0]):
+            for j in range(X.shape[1]):
+                if np.isfinite(slopes[i, j]):
+                    color = cmap(norm(slopes[i, j]))
+                    ax.arrow(X[i, j], Y[i, j], dx[i, j], dy[i, j],
+                             head_width=0.15, head_length=0.15,
+                             fc=color, ec=color, alpha=0.7,
+                             length_includes_head=True)
+        
+        # Add colorbar (caller keeps the reference to remove it later)
+        colorbar = fig.colorbar(sm, ax=ax)
+        colorbar.set_label('Steigung', rotation=270, labelpad=20)
+        
+        if dark_mode:
+            colorbar.ax.yaxis.label.set_color('#e0e0e0')
+            colorbar.ax.tick_params(colors='#e0e0e0')
+    
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+    ax.set_title('Richtungsfeld')
+    ax.grid(True, alpha=0.3)
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    
+    return colorbar
@@ -1,6 +1,5 @@
 import sys
 import os
-import subprocess
 from pathlib import Path
 from datetime import timedelta
 
@@ -15,23 +14,13 @@ from PySide6.QtMultimediaWidgets import QVideoWidget
 from PySide6.QtGui import QKeyEvent
 from PySide6.QtWidgets import QGraphicsColorizeEffect
 
+import extractor_core as core
+from extractor_core import sanitize_filename, format_time
+
 # ------------------ CONFIG ------------------
 BASE_DIR = Path(r"D:\_other\Celebs\Celebs")
-ILLEGAL_CHARS = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
 
 # ------------------ HELPERS ------------------
-def sanitize_filename(name: str) -> str:
-    for ch in ILLEGAL_CHARS:
-        name = name.replace(ch, '_')
-    return name.strip()
-
-def format_time(ms: int) -> str:
-    td = timedelta(milliseconds=ms)
-    hours, remainder = divmod(td.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    millis = td.microseconds // 1000
-    return f"{td.days * 24 + hours:02d}-{minutes:02d}-{seconds:02d}_{millis:03d}"
-
 def build_output_path(celebrity: str) -> Path:
     celeb_path = BASE_DIR / celebrity
     if not celeb_path.exists():
@@ -272,19 +261,14 @@ class VideoExtractor(QMainWindow):
         timestamp = format_time(self.media_player.position())
         outfile = self.output_path / f"{self.media_name}_{timestamp}.jpg"
         position_seconds = self.media_player.position() / 1000.0
-        
-        cmd = [
-            "ffmpeg", "-ss", str(position_seconds), "-i", str(self.input_file),
-            "-frames:v", "1", "-q:v", "2", "-pix_fmt", "yuvj420p", "-vsync", "0"
-        ]
-        
+
         if self.ffmpeg_brightness != 0:
-            cmd.extend(["-vf", f"eq=brightness={self.ffmpeg_brightness}"])
             self.log(f"Applying brightness: {self.ffmpeg_brightness:.2f}")
-
-        cmd.extend(["-y", str(outfile)])
-        
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            core.extract_image(self.input_file, position_seconds, outfile, self.brightness_filter())
+        except Exception as e:
+            self.log(f"Error: {core.error_text(e)}")
+            return
         self.log(f"Extracted image: {outfile.name}")
         self.statusBar().showMessage(f"Saved {outfile.name}")
 
@@ -298,7 +282,7 @@ class VideoExtractor(QMainWindow):
         if not self.output_path: return
 
         start = self.start_time / 1000.0
-        duration = (self.stop_time - self.start_time) / 1000.0
+        stop = self.stop_time / 1000.0
         timestamp = format_time(self.start_time)
         outfile = self.output_path / f"{self.media_name}_{timestamp}.mkv"
 
@@ -306,36 +290,27 @@ class VideoExtractor(QMainWindow):
 
         if not force_reencode:
             self.log("Extracting segment (fast copy mode)...")
-            cmd = [
-                "ffmpeg", "-ss", str(start), "-i", str(self.input_file),
-                "-t", str(duration), "-c", "copy",
-                "-avoid_negative_ts", "make_zero", "-y", str(outfile)
-            ]
         else:
             log_msg = "Extracting segment (re-encode mode)"
             if self.ffmpeg_brightness != 0:
                 log_msg += f" with brightness {self.ffmpeg_brightness:.2f}"
             self.log(log_msg)
 
-            cmd = [
-                "ffmpeg", "-ss", str(start), "-i", str(self.input_file),
-                "-t", str(duration), "-c:v", "libx264", "-c:a", "aac",
-                "-avoid_negative_ts", "make_zero"
-            ]
-
-            if self.ffmpeg_brightness != 0:
-                cmd.extend(["-vf", f"eq=brightness={self.ffmpeg_brightness}"])
-            
-            cmd.extend(["-y", str(outfile)])
-        
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        self.log(f"Extracted segment: {outfile.name}")
-        self.statusBar().showMessage(f"Saved {outfile.name}")
+        try:
+            core.extract_segment(self.input_file, start, stop, outfile,
+                                 "accurate" if force_reencode else "copy", self.brightness_filter(), log=self.log)
+            self.log(f"Extracted segment: {outfile.name}")
+            self.statusBar().showMessage(f"Saved {outfile.name}")
+        except Exception as e:
+            self.log(f"Error: {core.error_text(e)}")
 
         self.start_time = None
         self.stop_time = None
         self.extract_segment_button.setEnabled(False)
 
+    def brightness_filter(self):
+        return f"eq=brightness={self.ffmpeg_brightness}" if self.ffmpeg_brightness != 0 else None
+
     def open_output_folder(self):
         if self.output_path and self.output_path.exists():
             os.startfile(self.output_path)
@@ -1,41 +1,125 @@
 import sys
 import os
-import subprocess
-import shlex
+import queue
 from pathlib import Path
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QFileDialog, QLabel, QPushButton,
     QLineEdit, QTextEdit, QVBoxLayout, QHBoxLayout, QSlider, QRadioButton,
-    QButtonGroup, QCheckBox, QMessageBox, QStyle, QStatusBar
+    QButtonGroup, QCheckBox, QMessageBox, QStyle, QStatusBar, QListWidget, QListWidgetItem
 )
-from PySide6.QtCore import Qt, QUrl, QTimer
+from PySide6.QtCore import Qt, QUrl, QTimer, QSize, QRect, QPoint, QEvent
+from PySide6.QtGui import QIcon, QPixmap, QPainter
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtMultimediaWidgets import QVideoWidget
 
-ROOT_FOLDER = r"C:\\_other\\Celebs\\MediaPlayer-Extractor"
-ILLEGAL_CHARS = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
-
-
-def sanitize_filename(name: str) -> str:
-    for ch in ILLEGAL_CHARS:
-        name = name.replace(ch, '_')
-    return name.strip()
+import extractor_core as core
 
+ROOT_FOLDER = r"C:\\_other\\Celebs\\MediaPlayer-Extractor"
+MAX_PARALLEL_JOBS = 2   # ffmpeg processes running at the same time
+JOB_POLL_MS = 100       # how often the GUI picks up job updates
+CACHE_FOLDER = Path(ROOT_FOLDER) / "_cache"  # per-file analysis results (scenes, timeline sprite)
 
-def format_time(ms: int) -> str:
-    td = timedelta(milliseconds=ms)
-    hours, remainder = divmod(td.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    millis = td.microseconds // 1000
-    return f"{td.days * 24 + hours:02d}-{minutes:02d}-{seconds:02d}_{millis:03d}"
+STRIP_HEIGHT = 54  # timeline thumbnail strip above the slider
 
 
-def build_output_path(input_file: Path, mode: str, media_name: str) -> Path:
-    base = Path(ROOT_FOLDER) / media_name
-    base.mkdir(parents=True, exist_ok=True)
-    return base
+class ThumbnailStrip(QWidget):
+    """Sprite thumbnails above the slider. Hovering shows a larger preview, a click seeks."""
+    def __init__(self, seek):
+        super().__init__()
+        self.seek = seek
+        self.sprite = None
+        self.pixmap = None
+        self.setFixedHeight(STRIP_HEIGHT)
+        self.setMouseTracking(True)
+        self.preview = QLabel(None, Qt.ToolTip)
+
+    def set_sprite(self, sprite):
+        self.sprite = sprite
+        self.pixmap = QPixmap(sprite["image"]) if sprite else None
+        if self.pixmap is not None and self.pixmap.isNull():
+            self.pixmap = None
+        self.hide_preview()
+        self.update()
+
+    def tile(self, seconds: float) -> QPixmap:
+        sprite = self.sprite
+        index = min(max(int(seconds // sprite["interval"]), 0), sprite["count"] - 1)
+        width = self.pixmap.width() // sprite["columns"]
+        height = self.pixmap.height() // sprite["rows"]
+        row, col = divmod(index, sprite["columns"])
+        return self.pixmap.copy(col * width, row * height, width, height)
+
+    def time_at(self, fraction: float) -> float:
+        return min(max(fraction, 0.0), 1.0) * self.sprite["duration"]
+
+    def paintEvent(self, event):
+        if self.pixmap is None:
+            return
+        painter = QPainter(self)
+        thumb = self.tile(0)
+        thumb_width = max(1, thumb.width() * self.height() // max(thumb.height(), 1))
+        count = max(1, self.width() // thumb_width)
+        width = self.width() / count
+        for i in range(count):
+            rect = QRect(int(i * width), 0, int((i + 1) * width) - int(i * width), self.height())
+            painter.drawPixmap(rect, self.tile(self.time_at((i + 0.5) / count)))
+        painter.end()
+
+    def show_preview(self, fraction: float, global_pos: QPoint):
+        """Preview the frame at fraction (0..1) of the file above global_pos"""
+        if self.pixmap is None:
+            return
+        seconds = self.time_at(fraction)
+        thumb = self.tile(seconds)
+        painter = QPainter(thumb)
+        painter.setPen(Qt.white)
+        painter.drawText(thumb.rect().adjusted(4, 0, 0, -2), Qt.AlignLeft | Qt.AlignBottom,
+                         str(timedelta(seconds=int(seconds))))
+        painter.end()
+        self.preview.setPixmap(thumb)
+        self.preview.resize(thumb.size())
+        self.preview.move(global_pos - QPoint(thumb.width() // 2, thumb.height() + 8))
+        self.preview.show()
+
+    def hide_preview(self):
+        self.preview.hide()
+
+    def mouseMoveEvent(self, event):
+        pos = event.position().toPoint()
+        self.show_preview(pos.x() / max(self.width(), 1), self.mapToGlobal(QPoint(pos.x(), 0)))
+
+    def leaveEvent(self, event):
+        self.hide_preview()
+
+    def mousePressEvent(self, event):
+        if self.sprite and event.button() == Qt.LeftButton:
+            fraction = event.position().x() / max(self.width(), 1)
+            self.seek(int(self.time_at(fraction) * 1000))
+
+
+class ExtractionJob:
+    """
+    One queued extraction. work(log) runs in a worker thread and raises on failure,
+    log only hands messages over to the GUI thread. on_done(result) is called in the
+    GUI thread with work's return value.
+    """
+    def __init__(self, job_id: int, label: str, outfile: Path, work, on_done=None, pool=None):
+        self.id = job_id
+        self.label = label
+        self.outfile = outfile
+        self.work = work
+        self.on_done = on_done
+        self.pool = pool
+        self.status = "queued"
+        self.error = ""
+        self.attempts = 0
+
+    def text(self) -> str:
+        retry = f" (attempt {self.attempts})" if self.attempts > 1 else ""
+        return f"[{self.status}] {self.label}{retry}"
 
 
 class VideoExtractor(QMainWindow):
@@ -67,6 +151,13 @@ class VideoExtractor(QMainWindow):
         self.extract_image_button = QPushButton("Extract Image (I)")
         self.extract_image_button.clicked.connect(self.extract_image)
 
+        self.mark_still_button = QPushButton("Mark Still (M)")
+        self.mark_still_button.clicked.connect(self.mark_still)
+
+        self.extract_stills_button = QPushButton("Extract marked Stills (B)")
+        self.extract_stills_button.setEnabled(False)
+        self.extract_stills_button.clicked.connect(self.extract_marked_stills)
+
         self.start_segment_button = QPushButton("Start extract Segment (S)")
         self.start_segment_button.clicked.connect(self.toggle_segment)
 
@@ -77,9 +168,28 @@ class VideoExtractor(QMainWindow):
         self.accurate_checkbox = QCheckBox("Accurate (re-encode)")
         self.accurate_checkbox.setChecked(True)
 
+        self.smart_cut_checkbox = QCheckBox("Smart cut (re-encode only the cut GOPs)")
+        self.smart_cut_checkbox.setChecked(True)
+        self.smart_cut_checkbox.toggled.connect(lambda on: self.accurate_checkbox.setEnabled(not on))
+        self.accurate_checkbox.setEnabled(False)
+
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
 
+        self.job_list = QListWidget()
+        self.job_list.itemDoubleClicked.connect(self.retry_job_item)
+        self.retry_button = QPushButton("Retry failed jobs")
+        self.retry_button.clicked.connect(self.retry_failed)
+
+        self.detect_scenes_button = QPushButton("Detect Scenes")
+        self.detect_scenes_button.clicked.connect(self.start_scene_detection)
+        self.scene_list = QListWidget()
+        self.scene_list.setIconSize(QSize(96, 54))
+        self.scene_list.itemClicked.connect(self.jump_to_scene)
+        self.scene_list.itemDoubleClicked.connect(self.extract_scene)
+        self.extract_scene_button = QPushButton("Extract selected Scene")
+        self.extract_scene_button.clicked.connect(lambda: self.extract_scene(self.scene_list.currentItem()))
+
         self.play_button = QPushButton()
         self.play_button.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
         self.play_button.clicked.connect(self.play_pause)
@@ -90,12 +200,19 @@ class VideoExtractor(QMainWindow):
 
         self.time_label = QLabel("00:00:00.000")
 
+        self.thumb_strip = ThumbnailStrip(self.set_position)
+        self.slider.setMouseTracking(True)
+        self.slider.installEventFilter(self)
+
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        self.job_status_label = QLabel("Jobs: idle")
+        self.status_bar.addPermanentWidget(self.job_status_label)
 
         # Layouts
         left_layout = QVBoxLayout()
         left_layout.addWidget(self.video_widget)
+        left_layout.addWidget(self.thumb_strip)
         control_layout = QHBoxLayout()
         control_layout.addWidget(self.play_button)
         control_layout.addWidget(self.slider)
@@ -106,9 +223,19 @@ class VideoExtractor(QMainWindow):
         right_layout.addWidget(QLabel("Scene name:"))
         right_layout.addWidget(self.scene_name_input)
         right_layout.addWidget(self.extract_image_button)
+        right_layout.addWidget(self.mark_still_button)
+        right_layout.addWidget(self.extract_stills_button)
         right_layout.addWidget(self.start_segment_button)
         right_layout.addWidget(self.extract_segment_button)
+        right_layout.addWidget(self.smart_cut_checkbox)
         right_layout.addWidget(self.accurate_checkbox)
+        right_layout.addWidget(QLabel("Scenes (click: jump, double-click: extract):"))
+        right_layout.addWidget(self.detect_scenes_button)
+        right_layout.addWidget(self.scene_list)
+        right_layout.addWidget(self.extract_scene_button)
+        right_layout.addWidget(QLabel("Jobs (double-click a failed job to retry):"))
+        right_layout.addWidget(self.job_list)
+        right_layout.addWidget(self.retry_button)
         right_layout.addWidget(QLabel("Log:"))
         right_layout.addWidget(self.log_area)
 
@@ -135,6 +262,19 @@ class VideoExtractor(QMainWindow):
         self.output_folder = None
         self.segment_start = None
         self.segment_stop = None
+        self.marked_stills = []
+        self.scenes = []
+
+        # Job queue: extractions run in the pool, workers only talk to the GUI through job_updates
+        self.jobs = {}
+        self.job_items = {}
+        self.next_job_id = 1
+        self.pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_JOBS)
+        self.analysis_pool = ThreadPoolExecutor(max_workers=1)  # long passes (thumbnails, scenes) don't block extractions
+        self.job_updates = queue.Queue()
+        self.job_timer = QTimer(self)
+        self.job_timer.timeout.connect(self.poll_jobs)
+        self.job_timer.start(JOB_POLL_MS)
 
         # Signals
         self.media_player.positionChanged.connect(self.update_position)
@@ -149,17 +289,22 @@ class VideoExtractor(QMainWindow):
         if not file_path:
             return
         self.input_file = Path(file_path)
-        mode = "Movie" if self.mode_movie.isChecked() else "Series"
-        if mode == "Movie":
-            self.media_name = self.input_file.parent.name
-        else:
-            try:
-                self.media_name = self.input_file.parent.parent.name
-            except Exception:
-                self.media_name = self.input_file.parent.name
-        self.media_name = sanitize_filename(self.media_name)
-        self.output_folder = build_output_path(self.input_file, mode, self.media_name)
+        self.media_name = core.media_name_for(self.input_file, series=self.mode_series.isChecked())
+        self.output_folder = core.output_folder(ROOT_FOLDER, self.media_name)
         self.media_player.setSource(QUrl.fromLocalFile(str(self.input_file)))
+        self.clear_marked_stills()
+        self.thumb_strip.set_sprite(None)
+        sprite = core.load_sprite(self.input_file, CACHE_FOLDER)
+        if sprite is not None:
+            self.thumb_strip.set_sprite(sprite)
+        else:
+            self.start_sprite_build()
+        self.show_scenes([])
+        scenes = core.load_scenes(self.input_file, CACHE_FOLDER)
+        if scenes is not None:
+            self.show_scenes(scenes)
+        else:
+            self.start_scene_detection()
         self.log(f"Opened file: {self.input_file}")
         self.log(f"Media name: {self.media_name}")
         self.log(f"Output folder: {self.output_folder}")
@@ -191,16 +336,106 @@ class VideoExtractor(QMainWindow):
         return self.time_label.text()
 
     def current_time_for_filename(self):
-        return format_time(self.media_player.position())
+        return core.format_time(self.media_player.position())
 
     def extract_image(self):
         if not self.input_file:
             return
-        scene_name = sanitize_filename(self.scene_name_input.text() or "Scene")
-        timestamp = self.current_time_for_filename()
-        outfile = self.output_folder / f"{scene_name}_{timestamp}.jpg"
-        cmd = f'ffmpeg -ss {self.current_time_str()} -i "{self.input_file}" -frames:v 1 -q:v 2 -y "{outfile}"'
-        self.run_ffmpeg(cmd, outfile)
+        position = self.media_player.position()
+        outfile = core.outfile_for(self.output_folder, self.scene_name_input.text(), position, ".jpg")
+        input_file = self.input_file
+        self.submit_job(f"Image {self.current_time_str()}", outfile,
+                        lambda log: core.extract_image(input_file, position / 1000, outfile))
+
+    # ---------------- Timeline thumbnails ----------------
+    def start_sprite_build(self):
+        input_file = self.input_file
+
+        def done(sprite):
+            if self.input_file == input_file:
+                self.thumb_strip.set_sprite(sprite)
+
+        self.submit_job(f"Thumbnails: {input_file.name}", core.sprite_index(input_file, CACHE_FOLDER),
+                        lambda log: core.build_sprite(input_file, CACHE_FOLDER, log),
+                        on_done=done, pool=self.analysis_pool)
+
+    def eventFilter(self, obj, event):
+        """Hover preview over the slider, same as over the strip"""
+        if obj is self.slider:
+            if event.type() == QEvent.MouseMove:
+                x = event.position().toPoint().x()
+                self.thumb_strip.show_preview(x / max(self.slider.width(), 1),
+                                              self.slider.mapToGlobal(QPoint(x, 0)))
+            elif event.type() == QEvent.Leave:
+                self.thumb_strip.hide_preview()
+        return super().eventFilter(obj, event)
+
+    # ---------------- Scenes ----------------
+    def start_scene_detection(self):
+        if not self.input_file:
+            return
+        input_file = self.input_file
+
+        def done(scenes):
+            if self.input_file == input_file:
+                self.show_scenes(scenes)
+
+        self.submit_job(f"Scenes: {input_file.name}", core.scenes_index(input_file, CACHE_FOLDER),
+                        lambda log: core.detect_scenes(input_file, CACHE_FOLDER, log),
+                        on_done=done, pool=self.analysis_pool)
+
+    def show_scenes(self, scenes: list):
+        self.scenes = scenes
+        self.scene_list.clear()
+        for scene in scenes:
+            item = QListWidgetItem(QIcon(scene["thumb"]), self.ms_to_ffmpeg_time(int(scene["time"] * 1000)))
+            self.scene_list.addItem(item)
+
+    def jump_to_scene(self, item):
+        row = self.scene_list.row(item)
+        self.set_position(int(self.scenes[row]["time"] * 1000))
+
+    def extract_scene(self, item):
+        """Queue the scene from its boundary up to the next one (or the end) as segment"""
+        if item is None or not self.input_file:
+            return
+        row = self.scene_list.row(item)
+        self.segment_start = int(self.scenes[row]["time"] * 1000)
+        if row + 1 < len(self.scenes):
+            self.segment_stop = int(self.scenes[row + 1]["time"] * 1000)
+        else:
+            self.segment_stop = self.slider.maximum()
+        if self.segment_stop <= self.segment_start:
+            self.segment_start = self.segment_stop = None
+            return
+        self.start_segment_button.setText("Start extract Segment (S)")
+        self.extract_segment()
+
+    def mark_still(self):
+        """Remember the current position, all marks are extracted together by extract_marked_stills"""
+        if not self.input_file:
+            return
+        outfile = core.outfile_for(self.output_folder, self.scene_name_input.text(),
+                                   self.media_player.position(), ".jpg")
+        if any(o == outfile for _, o in self.marked_stills):
+            return
+        self.marked_stills.append((self.media_player.position() / 1000, outfile))
+        self.extract_stills_button.setText(f"Extract marked Stills (B) [{len(self.marked_stills)}]")
+        self.extract_stills_button.setEnabled(True)
+        self.log(f"Marked still: {self.current_time_str()} ({len(self.marked_stills)} marked)")
+
+    def clear_marked_stills(self):
+        self.marked_stills = []
+        self.extract_stills_button.setText("Extract marked Stills (B)")
+        self.extract_stills_button.setEnabled(False)
+
+    def extract_marked_stills(self):
+        if not (self.input_file and self.marked_stills):
+            return
+        input_file, stills = self.input_file, list(self.marked_stills)
+        self.submit_job(f"{len(stills)} stills", self.output_folder,
+                        lambda log: core.extract_stills(input_file, stills, log))
+        self.clear_marked_stills()
 
     def toggle_segment(self):
         if self.segment_start is None:
@@ -217,19 +452,18 @@ class VideoExtractor(QMainWindow):
             self.log(f"Segment stop: {self.current_time_str()}")
 
     def extract_segment(self):
-        if not (self.segment_start and self.segment_stop):
+        if self.segment_start is None or self.segment_stop is None:
             return
-        scene_name = sanitize_filename(self.scene_name_input.text() or "Scene")
-        start_str = format_time(self.segment_start)
-        stop_str = format_time(self.segment_stop)
-        outfile = self.output_folder / f"{scene_name}_{start_str}.mkv"
-        start_tc = self.ms_to_ffmpeg_time(self.segment_start)
-        stop_tc = self.ms_to_ffmpeg_time(self.segment_stop)
-        if self.accurate_checkbox.isChecked():
-            cmd = f'ffmpeg -ss {start_tc} -i "{self.input_file}" -to {stop_tc} -c:v libx264 -crf 18 -preset veryfast -c:a aac -b:a 192k -y "{outfile}"'
+        outfile = core.outfile_for(self.output_folder, self.scene_name_input.text(), self.segment_start, ".mkv")
+        if self.smart_cut_checkbox.isChecked():
+            mode = "smart"
+        elif self.accurate_checkbox.isChecked():
+            mode = "accurate"
         else:
-            cmd = f'ffmpeg -ss {start_tc} -to {stop_tc} -i "{self.input_file}" -c copy -avoid_negative_ts 1 -y "{outfile}"'
-        self.run_ffmpeg(cmd, outfile)
+            mode = "copy"
+        input_file, start, stop = self.input_file, self.segment_start / 1000, self.segment_stop / 1000
+        label = f"Segment {self.ms_to_ffmpeg_time(self.segment_start)} - {self.ms_to_ffmpeg_time(self.segment_stop)} ({mode})"
+        self.submit_job(label, outfile, lambda log: core.extract_segment(input_file, start, stop, outfile, mode, log=log))
         self.segment_start = None
         self.segment_stop = None
         self.extract_segment_button.setEnabled(False)
@@ -241,13 +475,110 @@ class VideoExtractor(QMainWindow):
         millis = td.microseconds // 1000
         return f"{h:02d}:{m:02d}:{s:02d}.{millis:03d}"
 
-    def run_ffmpeg(self, cmd, outfile):
-        self.log(f"Running: {cmd}")
+    # ---------------- Job queue ----------------
+    def submit_job(self, label: str, outfile: Path, work, on_done=None, pool=None):
+        """Queue an extraction and return at once, the pool runs it in the background"""
+        job = ExtractionJob(self.next_job_id, label, outfile, work, on_done, pool)
+        self.next_job_id += 1
+        self.jobs[job.id] = job
+        self.job_list.addItem(job.text())
+        self.job_items[job.id] = self.job_list.item(self.job_list.count() - 1)
+        self.start_job(job)
+
+    def start_job(self, job: ExtractionJob):
+        job.status = "queued"
+        job.error = ""
+        job.attempts += 1
+        self.update_job(job)
+        (job.pool or self.pool).submit(self.run_job, job)
+
+    def run_job(self, job: ExtractionJob):
+        """Worker thread: never touch widgets here, only job_updates"""
+        self.job_updates.put((job.id, "running", None))
         try:
-            subprocess.run(shlex.split(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-            self.log(f"Saved: {outfile}")
-        except subprocess.CalledProcessError as e:
-            self.log(f"Error: {e.stderr.decode(errors='ignore')}")
+            result = job.work(lambda msg: self.job_updates.put((job.id, "log", msg)))
+        except Exception as e:
+            self.job_updates.put((job.id, "failed", core.error_text(e)))
+        else:
+            self.job_updates.put((job.id, "done", result))
+
+    def poll_jobs(self):
+        changed = False
+        while True:
+            try:
+                job_id, kind, data = self.job_updates.get_nowait()
+            except queue.Empty:
+                break
+            job = self.jobs[job_id]
+            if kind == "log":
+                self.log(f"{job.label}: {data}")
+                continue
+            job.status = kind
+            changed = True
+            if kind == "done":
+                if job.on_done:
+                    job.on_done(data)
+                else:
+                    self.log(f"Saved: {job.outfile}")
+            elif kind == "failed":
+                job.error = data
+                self.log(f"Error ({job.label}): {data}")
+            self.update_job(job)
+        if changed:
+            self.update_job_summary()
+
+    def update_job(self, job: ExtractionJob):
+        item = self.job_items[job.id]
+        item.setText(job.text())
+        item.setToolTip(job.error or str(job.outfile))
+        self.update_job_summary()
+
+    def update_job_summary(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        parts = [f"{counts[s]} {s}" for s in ("running", "queued", "failed", "done") if counts.get(s)]
+        self.job_status_label.setText("Jobs: " + (", ".join(parts) if parts else "idle"))
+        self.retry_button.setEnabled(bool(counts.get("failed")))
+
+    def retry_failed(self):
+        for job in self.jobs.values():
+            if job.status == "failed":
+                self.start_job(job)
+
+    def retry_job_item(self, item):
+        for job_id, job_item in self.job_items.items():
+            if job_item is item and self.jobs[job_id].status == "failed":
+                self.start_job(self.jobs[job_id])
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key == Qt.Key_I:
+            self.extract_image()
+        elif key == Qt.Key_M:
+            self.mark_still()
+        elif key == Qt.Key_B:
+            self.extract_marked_stills()
+        elif key == Qt.Key_S:
+            self.toggle_segment()
+        elif key == Qt.Key_E:
+            if self.extract_segment_button.isEnabled():
+                self.extract_segment()
+        else:
+            super().keyPressEvent(event)
+
+    def closeEvent(self, event):
+        busy = [j for j in self.jobs.values() if j.status in ("queued", "running")]
+        if busy and QMessageBox.question(
+                self, "Jobs running",
+                f"{len(busy)} extraction(s) not finished yet. Quit anyway?") != QMessageBox.Yes:
+            event.ignore()
+            return
+        # queued jobs are dropped, running ffmpeg processes finish on their own
+        self.thumb_strip.hide_preview()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.analysis_pool.shutdown(wait=False, cancel_futures=True)
+        event.accept()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,6 @@
 import sys
 import os
-import subprocess
 import datetime
-import re
 from pathlib import Path
 
 from PyQt6.QtWidgets import (
@@ -13,20 +11,13 @@ from PyQt6.QtCore import Qt, QTimer, QUrl
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 
+import extractor_core as core
+from extractor_core import sanitize_filename, format_time as format_timestamp
+
 # ---- Config ----
 BASE_DIR = Path(r"D:\_other\Celebs\Celebs")
 SEGMENT_MODES = ["fast", "accurate"]
 
-# ---- Helpers ----
-def sanitize_filename(name):
-    return re.sub(r'[\\/:*?"<>|]', "_", name)
-
-def format_timestamp(ms):
-    seconds, ms = divmod(ms, 1000)
-    minutes, seconds = divmod(seconds, 60)
-    hours, minutes = divmod(minutes, 60)
-    return f"{int(hours):02d}-{int(minutes):02d}-{int(seconds):02d}_{int(ms):03d}"
-
 # ---- Main App ----
 class MediaTagger(QWidget):
     def __init__(self):
@@ -206,15 +197,9 @@ class MediaTagger(QWidget):
         timestamp = format_timestamp(self.player.position())
         media_name = sanitize_filename(self.current_file.stem)
         output_file = celeb / f"{media_name}_{timestamp}.jpg"
-        cmd = [
-            "ffmpeg", "-y", "-i", str(self.current_file),
-            "-ss", str(self.player.position()/1000),
-            "-vframes", "1"
-        ]
-        if self.brightness != 0:
-            cmd += ["-vf", f"eq=brightness={self.brightness}"]
-        cmd.append(str(output_file))
-        self.run_ffmpeg(cmd, f"Image saved: {output_file}")
+        input_file, seconds = self.current_file, self.player.position() / 1000
+        self.run_ffmpeg(lambda: core.extract_image(input_file, seconds, output_file, self.brightness_filter()),
+                        f"Image saved: {output_file}")
 
     def extract_segment(self):
         if not self.current_file or not self.start_time or not self.stop_time or self.stop_time <= self.start_time:
@@ -226,34 +211,23 @@ class MediaTagger(QWidget):
         timestamp = f"{format_timestamp(self.start_time)}_{format_timestamp(self.stop_time)}"
         media_name = sanitize_filename(self.current_file.stem)
         output_file = celeb / f"{media_name}_{timestamp}.mkv"
-        if self.segment_mode == "fast":
-            cmd = [
-                "ffmpeg", "-y", "-i", str(self.current_file),
-                "-ss", str(self.start_time/1000),
-                "-to", str(self.stop_time/1000),
-                "-c", "copy",
-                str(output_file)
-            ]
-        else:
-            cmd = [
-                "ffmpeg", "-y", "-i", str(self.current_file),
-                "-ss", str(self.start_time/1000),
-                "-to", str(self.stop_time/1000)
-            ]
-            if self.brightness != 0:
-                cmd += ["-vf", f"eq=brightness={self.brightness}"]
-            cmd.append(str(output_file))
-        self.run_ffmpeg(cmd, f"Segment saved: {output_file}")
+        mode = "copy" if self.segment_mode == "fast" else "accurate"
+        input_file, start, stop = self.current_file, self.start_time / 1000, self.stop_time / 1000
+        self.run_ffmpeg(lambda: core.extract_segment(input_file, start, stop, output_file, mode,
+                                                     self.brightness_filter(), log=self.log),
+                        f"Segment saved: {output_file}")
         self.start_time = None
         self.stop_time = None
 
-    def run_ffmpeg(self, cmd, success_msg):
-        self.log(f"Running: {' '.join(cmd)}")
+    def run_ffmpeg(self, extract, success_msg):
         try:
-            subprocess.run(cmd, check=True)
+            extract()
             self.log(success_msg)
-        except subprocess.CalledProcessError:
-            self.log("Error during ffmpeg execution")
+        except Exception as e:
+            self.log(f"Error during ffmpeg execution: {core.error_text(e)}")
+
+    def brightness_filter(self):
+        return f"eq=brightness={self.brightness}" if self.brightness != 0 else None
 
     def get_celebrity_folder(self):
         name = self.celebrity_input.text().strip()
@@ -1,6 +1,5 @@
 import sys
 import os
-import subprocess
 from pathlib import Path
 from datetime import timedelta
 
@@ -13,28 +12,10 @@ from PySide6.QtCore import Qt, QUrl
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtMultimediaWidgets import QVideoWidget
 
-ROOT_FOLDER = r"C:\\_other\\Celebs\\Extractor"
-ILLEGAL_CHARS = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
-
-
-def sanitize_filename(name: str) -> str:
-    for ch in ILLEGAL_CHARS:
-        name = name.replace(ch, '_')
-    return name.strip()
-
+import extractor_core as core
+from extractor_core import sanitize_filename, format_time
 
-def format_time(ms: int) -> str:
-    td = timedelta(milliseconds=ms)
-    hours, remainder = divmod(td.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    millis = td.microseconds // 1000
-    return f"{td.days * 24 + hours:02d}-{minutes:02d}-{seconds:02d}_{millis:03d}"
-
-
-def build_output_path(input_file: Path, mode: str, media_name: str) -> Path:
-    base = Path(ROOT_FOLDER) / media_name
-    base.mkdir(parents=True, exist_ok=True)
-    return base
+ROOT_FOLDER = r"C:\\_other\\Celebs\\Extractor"
 
 
 class VideoExtractor(QMainWindow):
@@ -158,15 +139,8 @@ class VideoExtractor(QMainWindow):
             self.log(f"Opened: {self.input_file.name}")
 
             # Compute media name
-            if self.mode_movie.isChecked():
-                self.media_name = sanitize_filename(self.input_file.parent.name)
-            else:
-                try:
-                    self.media_name = sanitize_filename(self.input_file.parent.parent.name)
-                except Exception:
-                    self.media_name = sanitize_filename(self.input_file.parent.name)
-
-            self.output_path = build_output_path(self.input_file, "mode", self.media_name)
+            self.media_name = core.media_name_for(self.input_file, series=not self.mode_movie.isChecked())
+            self.output_path = core.output_folder(ROOT_FOLDER, self.media_name)
             self.log(f"Output folder: {self.media_name}")
 
     def play_pause(self):
@@ -216,11 +190,11 @@ class VideoExtractor(QMainWindow):
         movie = self.media_name
         outfile = self.output_path / f"{scene} - {movie}_{timestamp}.jpg"
 
-        cmd = [
-            "ffmpeg", "-ss", str(pos/1000), "-i", str(self.input_file),
-            "-frames:v", "1", "-q:v", "2", "-pix_fmt", "yuvj420p", "-y", str(outfile)
-        ]
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            core.extract_image(self.input_file, pos / 1000, outfile)
+        except Exception as e:
+            self.log(f"Error: {core.error_text(e)}")
+            return
         self.log(f"Extracted image: {outfile.name}")
         self.statusBar().showMessage(f"Saved {outfile.name}")
 
@@ -233,30 +207,14 @@ class VideoExtractor(QMainWindow):
         scene = sanitize_filename(self.scene_name_input.text() or "Scene")
         movie = self.media_name
         outfile = self.output_path / f"{scene} - {movie}_{timestamp}.mkv"
-
-        duration = stop - start
-
-        if self.accurate_checkbox.isChecked():
-            cmd = [
-                "ffmpeg", "-ss", str(start),
-                "-i", str(self.input_file),
-                "-t", str(duration),
-                "-c:v", "libx264", "-c:a", "aac",
-                "-y", str(outfile)
-            ]
-        else:
-            cmd = [
-                "ffmpeg", "-ss", str(start),
-                "-i", str(self.input_file),
-                "-t", str(duration),
-                "-c", "copy",
-                "-avoid_negative_ts", "1",
-                "-y", str(outfile)
-            ]
-
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        self.log(f"Extracted segment: {outfile.name}")
-        self.statusBar().showMessage(f"Saved {outfile.name}")
+        mode = "accurate" if self.accurate_checkbox.isChecked() else "copy"
+
+        try:
+            core.extract_segment(self.input_file, start, stop, outfile, mode, log=self.log)
+            self.log(f"Extracted segment: {outfile.name}")
+            self.statusBar().showMessage(f"Saved {outfile.name}")
+        except Exception as e:
+            self.log(f"Error: {core.error_text(e)}")
         self.start_time = None
         self.stop_time = None
         self.extract_segment_button.setEnabled(False)
@@ -1,12 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
-import subprocess
 import os
-from datetime import timedelta
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # MediaPlayer-Extractor/, for the core
+import extractor_core as core
 
 # -------- CONFIG --------
 ROOT_OUTPUT_FOLDER = r"C:\_other\Celebs\Extractor"
-FFMPEG_PATH = "ffmpeg"  # Ensure ffmpeg is in PATH or provide full path
 # ------------------------
 
 # --- Functions ---
@@ -32,14 +33,6 @@ def reset_status(*args):
 def update_status(message, success=True):
     status_label.config(text=message, bg="green" if success else "red", fg="white")
 
-def str_to_timedelta(time_str):
-    """Convert HH:MM:SS.mmm string to timedelta."""
-    h, m, s = time_str.split(":")
-    if "." in s:
-        sec, ms = s.split(".")
-        return timedelta(hours=int(h), minutes=int(m), seconds=int(sec), milliseconds=int(ms))
-    return timedelta(hours=int(h), minutes=int(m), seconds=int(s))
-
 def extract_segment():
     file_path = entry_file_var.get().strip()
     start_time = entry_start_var.get().strip()
@@ -58,14 +51,11 @@ def extract_segment():
         update_status("Please enter a scene name.", success=False)
         return
 
-    # Calculate duration
-    start_td = str_to_timedelta(start_time)
-    end_td = str_to_timedelta(end_time)
-    duration_td = end_td - start_td
-    if duration_td.total_seconds() <= 0:
+    start = core.parse_time(start_time)
+    end = core.parse_time(end_time)
+    if end <= start:
         update_status("End time must be after start time.", success=False)
         return
-    duration_str = str(duration_td)
 
     output_folder = get_movie_folder(file_path)
     _, ext = os.path.splitext(file_path)
@@ -74,21 +64,10 @@ def extract_segment():
     safe_end = end_time.replace(":", "-").replace(".", "_")
     output_file = os.path.join(output_folder, f"{safe_scene_name}_{safe_start}_{safe_end}{ext}")
 
-    # Option 1: -ss before -i, use -t for duration
-    command = [
-        FFMPEG_PATH, "-y",
-        "-ss", start_time,
-        "-i", file_path,
-        "-t", str(duration_td.total_seconds()),
-        "-c:v", "copy",
-        "-c:a", "copy",
-        output_file
-    ]
-
     try:
-        subprocess.run(command, check=True)
+        core.extract_segment(file_path, start, end, output_file, "copy")
         update_status(f"Segment saved to {output_file}", success=True)
-    except subprocess.CalledProcessError:
+    except Exception:
         update_status("Failed to extract video segment.", success=False)
 
 def extract_image():
@@ -116,12 +95,10 @@ def extract_image():
     
     output_file = os.path.join(output_folder, f"{safe_image_name}_{safe_timestamp}.png")
     
-    command = [FFMPEG_PATH, "-y", "-ss", timestamp, "-i", file_path, "-vframes", "1", output_file]
-    
     try:
-        subprocess.run(command, check=True)
+        core.extract_image(file_path, core.parse_time(timestamp), output_file)
         update_status(f"Image saved to {output_file}", success=True)
-    except subprocess.CalledProcessError:
+    except Exception:
         update_status("Failed to extract image.", success=False)
 
 
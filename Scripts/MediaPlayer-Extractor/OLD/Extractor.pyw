@@ -1,12 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
-import subprocess
 import os
-from datetime import timedelta
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # MediaPlayer-Extractor/, for the core
+import extractor_core as core
 
 # -------- CONFIG --------
 ROOT_OUTPUT_FOLDER = r"C:\_other\Celebs\Extractor"
-FFMPEG_PATH = "ffmpeg"  # Ensure ffmpeg is in PATH or provide full path
 # ------------------------
 
 # --- Functions ---
@@ -32,30 +33,6 @@ def reset_status(*args):
 def update_status(message, success=True):
     status_label.config(text=message, bg="green" if success else "red", fg="white")
 
-def str_to_timedelta(time_str):
-    """Convert time string to timedelta. Supports HH:MM:SS, MM:SS, or with milliseconds."""
-    parts = time_str.split(":")
-    try:
-        if len(parts) == 3:
-            h, m, s = parts
-        elif len(parts) == 2:
-            h = 0
-            m, s = parts
-        elif len(parts) == 1:
-            h = 0
-            m = 0
-            s = parts[0]
-        else:
-            raise ValueError("Invalid time format")
-        
-        if "." in s:
-            sec, ms = s.split(".")
-            return timedelta(hours=int(h), minutes=int(m), seconds=int(sec), milliseconds=int(ms))
-        return timedelta(hours=int(h), minutes=int(m), seconds=int(s))
-    except Exception as e:
-        raise ValueError(f"Cannot parse time '{time_str}': {e}")
-
-
 def extract_segment():
     file_path = entry_file_var.get().strip()
     start_time = entry_start_var.get().strip()
@@ -74,19 +51,16 @@ def extract_segment():
         update_status("Please enter a scene name.", success=False)
         return
 
-    # Calculate duration
     try:
-        start_td = str_to_timedelta(start_time)
-        end_td = str_to_timedelta(end_time)
-    except Exception as e:
+        start = core.parse_time(start_time)
+        end = core.parse_time(end_time)
+    except ValueError as e:
         update_status(f"Time parsing error: {e}", success=False)
         return
 
-    duration_td = end_td - start_td
-    if duration_td.total_seconds() <= 0:
+    if end <= start:
         update_status("End time must be after start time.", success=False)
         return
-    duration_str = str(duration_td)
 
     output_folder = get_movie_folder(file_path)
     _, ext = os.path.splitext(file_path)
@@ -95,22 +69,11 @@ def extract_segment():
     safe_end = end_time.replace(":", "-").replace(".", "_")
     output_file = os.path.join(output_folder, f"{safe_scene_name}_{safe_start}_{safe_end}{ext}")
 
-    # Option 1: -ss before -i, use -t for duration
-    command = [
-        FFMPEG_PATH, "-y",
-        "-ss", start_time,
-        "-i", file_path,
-        "-t", str(duration_td.total_seconds()),
-        "-c:v", "libx264",  # re-encode video
-        "-c:a", "aac",      # re-encode audio
-        output_file
-    ]
-
     try:
-        subprocess.run(command, check=True, capture_output=True, text=True)
+        core.extract_segment(file_path, start, end, output_file, "accurate")  # re-encode video and audio
         update_status(f"Segment saved to {output_file}", success=True)
-    except subprocess.CalledProcessError as e:
-    	update_status(f"Failed: {e.stderr}", success=False)
+    except Exception as e:
+        update_status(f"Failed: {core.error_text(e)}", success=False)
 
 def extract_image():
     file_path = entry_file_var.get().strip()
@@ -137,12 +100,10 @@ def extract_image():
     
     output_file = os.path.join(output_folder, f"{safe_image_name}_{safe_timestamp}.png")
     
-    command = [FFMPEG_PATH, "-y", "-ss", timestamp, "-i", file_path, "-vframes", "1", output_file]
-    
     try:
-        subprocess.run(command, check=True)
+        core.extract_image(file_path, core.parse_time(timestamp), output_file)
         update_status(f"Image saved to {output_file}", success=True)
-    except subprocess.CalledProcessError:
+    except Exception:
         update_status("Failed to extract image.", success=False)
 
 
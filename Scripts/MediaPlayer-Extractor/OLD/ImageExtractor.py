@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import subprocess
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # MediaPlayer-Extractor/, for the core
+import extractor_core as core
 
 # -------- CONFIG --------
 OUTPUT_FOLDER = r"C:\_other\Celebs\ImageExtractor"  # Change to your desired folder
-FFMPEG_PATH = "ffmpeg"  # Ensure ffmpeg is in PATH or provide full path
 # ------------------------
 
 def browse_file():
@@ -46,19 +48,12 @@ def extract_image():
 
     output_file = os.path.join(OUTPUT_FOLDER, f"{safe_image_name}_{safe_time}.jpg")
 
-    command = [
-        FFMPEG_PATH, "-y",
-        "-ss", timestamp,
-        "-i", file_path,
-        "-vframes", "1",  # Only one frame
-        "-q:v", "2",      # Quality: lower = better
-        output_file
-    ]
-
     try:
-        subprocess.run(command, check=True)
+        core.extract_image(file_path, core.parse_time(timestamp), output_file)
         messagebox.showinfo("Success", f"Image saved to:\n{output_file}")
-    except subprocess.CalledProcessError:
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+    except Exception:
         messagebox.showerror("Error", "Failed to extract image. Check ffmpeg installation.")
 
 # --- GUI Setup ---
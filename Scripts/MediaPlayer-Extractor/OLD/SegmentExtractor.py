@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import subprocess
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # MediaPlayer-Extractor/, for the core
+import extractor_core as core
 
 # -------- CONFIG --------
 OUTPUT_FOLDER = r"C:\_other\Celebs\SegmentExtractor"  # Change to your desired folder
-FFMPEG_PATH = "ffmpeg"  # Ensure ffmpeg is in PATH or provide full path
 # ------------------------
 
 def browse_file():
@@ -52,19 +54,12 @@ def extract_segment():
     # Use only scene name + times for output file
     output_file = os.path.join(OUTPUT_FOLDER, f"{safe_scene_name}_{safe_start}_{safe_end}{ext}")
 
-    command = [
-        FFMPEG_PATH, "-y",
-        "-ss", start_time,
-        "-to", end_time,
-        "-i", file_path,
-        "-c", "copy",
-        output_file
-    ]
-
     try:
-        subprocess.run(command, check=True)
+        core.extract_segment(file_path, core.parse_time(start_time), core.parse_time(end_time), output_file, "copy")
         messagebox.showinfo("Success", f"Segment saved to:\n{output_file}")
-    except subprocess.CalledProcessError:
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+    except Exception:
         messagebox.showerror("Error", "Failed to extract video segment. Check ffmpeg installation.")
 
 # --- GUI Setup ---
@@ -0,0 +1,126 @@
+"""
+Bulk extraction without the GUI.
+
+Reads a CSV manifest with the columns file, start, end, name and extracts every
+row with extractor_core, several rows in parallel:
+
+    file,start,end,name
+    D:\\Movies\\Heat (1995)\\Heat.mkv,00:41:12.500,00:43:02.000,Bank
+    D:\\Movies\\Heat (1995)\\Heat.mkv,01:10:05.250,,Diner
+
+A row without end is a still image. Times are HH:MM:SS.mmm, MM:SS or seconds,
+relative file paths are relative to the manifest. All stills of one file are
+extracted together in a single ffmpeg run. Output goes to <output>/<media name>/
+with the same file names as the GUI.
+
+Usage:
+    python extractor_batch.py szenen.csv -o "C:\\_other\\Celebs\\MediaPlayer-Extractor" -j 4 --mode smart
+"""
+import argparse
+import csv
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import extractor_core as core
+
+COLUMNS = ("file", "start", "end", "name")
+
+
+def load_manifest(path):
+    """Rows of the manifest as dicts with file (Path), start / end (seconds, end None for stills), name"""
+    base = Path(path).resolve().parent
+    rows = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Manifest needs the columns {', '.join(COLUMNS)} (missing: {', '.join(missing)})")
+        for line, row in enumerate(reader, start=2):
+            if not (row["file"] or "").strip():
+                continue
+            try:
+                start = core.parse_time(row["start"])
+                end = core.parse_time(row["end"]) if (row["end"] or "").strip() else None
+            except ValueError as e:
+                raise ValueError(f"Line {line}: {e}") from None
+            if end is not None and end <= start:
+                raise ValueError(f"Line {line}: end must be after start")
+            rows.append({"line": line, "file": base / row["file"].strip(), "start": start, "end": end,
+                         "name": (row["name"] or "").strip() or "Scene"})
+    return rows
+
+
+def plan_tasks(rows, output_root, mode="smart", series=False):
+    """One task per segment row and one per input file for all of its stills: (label, outfiles, work)"""
+    tasks = []
+    stills = defaultdict(list)
+    for row in rows:
+        folder = core.output_folder(output_root, core.media_name_for(row["file"], series))
+        ms = round(row["start"] * 1000)
+        if row["end"] is None:
+            stills[row["file"]].append((row["start"], core.outfile_for(folder, row["name"], ms, ".jpg")))
+        else:
+            tasks.append((f"line {row['line']}", [core.outfile_for(folder, row["name"], ms, ".mkv")], row))
+
+    jobs = []
+    for label, outfiles, row in tasks:
+        jobs.append((label, outfiles,
+                     lambda log, row=row, outfile=outfiles[0]: core.extract_segment(
+                         row["file"], row["start"], row["end"], outfile, mode, log=log)))
+    for input_file, marks in stills.items():
+        unique = list({str(outfile): (seconds, outfile) for seconds, outfile in marks}.values())
+        jobs.append((f"{len(unique)} stills of {input_file.name}", [o for _, o in unique],
+                     lambda log, input_file=input_file, unique=unique: core.extract_stills(input_file, unique, log)))
+    return jobs
+
+
+def run_all(jobs, workers=2, quiet=False):
+    """Run the planned tasks in a thread pool (each one is an ffmpeg process). Returns (ok, errors)"""
+    log = (lambda msg: None) if quiet else print
+    ok, errors = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(work, log): (label, outfiles) for label, outfiles, work in jobs}
+        for future in as_completed(futures):
+            label, outfiles = futures[future]
+            try:
+                future.result()
+                ok.extend(outfiles)
+                for outfile in outfiles:
+                    print(f"[OK]    {outfile}")
+            except Exception as e:
+                errors.append((label, core.error_text(e)))
+                print(f"[ERROR] {label}: {core.error_text(e)}")
+    return ok, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract segments and stills listed in a CSV manifest")
+    parser.add_argument("manifest", help="CSV with the columns file,start,end,name (no end = still image)")
+    parser.add_argument("-o", "--output", required=True, help="root folder, files go to <output>/<media name>/")
+    parser.add_argument("-j", "--jobs", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="ffmpeg processes at the same time (default: half the CPU cores)")
+    parser.add_argument("--mode", default="smart", choices=core.SEGMENT_MODES, help="how segments are cut")
+    parser.add_argument("--series", action="store_true",
+                        help="media name from the folder above the season folder instead of the parent folder")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print results")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error(f"-j/--jobs must be at least 1, got {args.jobs}")
+
+    try:
+        rows = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Manifest error: {e}")
+    jobs = plan_tasks(rows, args.output, args.mode, args.series)
+    print(f"{len(rows)} rows -> {len(jobs)} ffmpeg tasks, {args.jobs} in parallel")
+    ok, errors = run_all(jobs, args.jobs, args.quiet)
+
+    print(f"\nDone: {len(ok)} files, {len(errors)} errors -> {os.path.abspath(args.output)}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+"""
+Extraction engine shared by the MediaPlayer-Extractor GUIs and extractor_batch.py.
+
+Everything that builds or runs ffmpeg / ffprobe lives here: stills, segments
+(copy / accurate / smart cut), batch stills, scene detection and the timeline
+sprite. The clients decide where the files go (root folder, file names) and how
+progress is shown. Failures raise subprocess.CalledProcessError (error_text gives
+the ffmpeg message) or RuntimeError, progress goes to an optional log callback.
+
+    import extractor_core as core
+    folder = core.output_folder(ROOT_FOLDER, core.media_name_for(path, series=False))
+    core.extract_segment(path, 12.5, 40.0, core.outfile_for(folder, "Scene", 12500, ".mkv"), "smart")
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+FFMPEG_PATH = "ffmpeg"
+FFPROBE_PATH = "ffprobe"
+ILLEGAL_CHARS = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
+SEGMENT_MODES = ("smart", "accurate", "copy")
+REENCODE = ["-c:v", "libx264", "-crf", "18", "-preset", "veryfast", "-c:a", "aac", "-b:a", "192k"]
+
+
+# ---------------- Names and folders ----------------
+def sanitize_filename(name: str) -> str:
+    for ch in ILLEGAL_CHARS:
+        name = name.replace(ch, '_')
+    return name.strip()
+
+
+def format_time(ms: int) -> str:
+    """Timestamp for file names: HH-MM-SS_mmm"""
+    td = timedelta(milliseconds=ms)
+    hours, remainder = divmod(td.seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    millis = td.microseconds // 1000
+    return f"{td.days * 24 + hours:02d}-{minutes:02d}-{seconds:02d}_{millis:03d}"
+
+
+def parse_time(text) -> float:
+    """Seconds from 'HH:MM:SS.mmm', 'MM:SS', plain seconds or a number"""
+    if isinstance(text, (int, float)):
+        return float(text)
+    parts = str(text).strip().split(":")
+    if len(parts) > 3:
+        raise ValueError(f"Cannot parse time '{text}'")
+    seconds = 0.0
+    try:
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"Cannot parse time '{text}'") from None
+    return seconds
+
+
+def media_name_for(input_file: Path, series: bool = False) -> str:
+    """Folder name of the movie (parent folder) or series (folder above the season)"""
+    input_file = Path(input_file)
+    folder = input_file.parent.parent if series and input_file.parent.parent.name else input_file.parent
+    return sanitize_filename(folder.name)
+
+
+def output_folder(root, media_name: str) -> Path:
+    base = Path(root) / media_name
+    base.mkdir(parents=True, exist_ok=True)
+    return base
+
+
+def outfile_for(folder: Path, name: str, ms: int, ext: str) -> Path:
+    """<folder>/<name>_<HH-MM-SS_mmm><ext>, the naming of the extractor GUI"""
+    return Path(folder) / f"{sanitize_filename(name or 'Scene')}_{format_time(ms)}{ext}"
+
+
+# ---------------- Running ffmpeg ----------------
+def run(cmd: list) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          text=True, errors="replace", check=True)
+
+
+def error_text(exc: Exception) -> str:
+    """The ffmpeg message of a failed run (or the exception itself)"""
+    if isinstance(exc, subprocess.CalledProcessError) and exc.stderr:
+        stderr = exc.stderr.decode(errors="ignore") if isinstance(exc.stderr, bytes) else exc.stderr
+        if stderr.strip():
+            return stderr.strip()
+    return str(exc)
+
+
+def extract_image(input_file: Path, seconds: float, outfile: Path, video_filter: str = None):
+    """Single still at seconds (first frame at or after it)"""
+    cmd = [FFMPEG_PATH, "-v", "error", "-ss", f"{seconds:.3f}", "-i", str(input_file), "-frames:v", "1", "-q:v", "2"]
+    if video_filter:
+        cmd += ["-vf", video_filter]
+    run(cmd + ["-y", str(outfile)])
+
+
+def reencode_segment(input_file: Path, start: float, end: float, outfile: Path, video_filter: str = None):
+    """Frame accurate segment, everything re-encoded"""
+    cmd = [FFMPEG_PATH, "-v", "error", "-ss", f"{max(start - CUT_EPSILON, 0):.4f}", "-i", str(input_file),
+           "-t", f"{end - start:.4f}"]
+    if video_filter:
+        cmd += ["-vf", video_filter]
+    run(cmd + REENCODE + ["-y", str(outfile)])
+
+
+def copy_segment(input_file: Path, start: float, end: float, outfile: Path):
+    """Stream copy, fast but starts at the keyframe before start"""
+    run([FFMPEG_PATH, "-v", "error", "-ss", f"{start:.3f}", "-i", str(input_file), "-t", f"{end - start:.3f}",
+         "-c", "copy", "-avoid_negative_ts", "1", "-y", str(outfile)])
+
+
+def extract_segment(input_file: Path, start: float, end: float, outfile: Path, mode: str = "smart",
+                    video_filter: str = None, log=print):
+    """
+    Segment [start, end] in seconds. mode is one of SEGMENT_MODES. A video_filter
+    (e.g. eq=brightness) needs a full re-encode, smart / copy switch to accurate then.
+    """
+    if mode not in SEGMENT_MODES:
+        raise ValueError(f"Unknown segment mode {mode!r}, expected one of {SEGMENT_MODES}")
+    if end <= start:
+        raise ValueError("End time must be after start time")
+    if video_filter and mode != "accurate":
+        log(f"Video filter set, re-encoding instead of {mode}")
+        mode = "accurate"
+    if mode == "smart":
+        smart_cut(input_file, start, end, outfile, log)
+    elif mode == "accurate":
+        reencode_segment(input_file, start, end, outfile, video_filter)
+    else:
+        copy_segment(input_file, start, end, outfile)
+
+
+# ---------------- Smart cut ----------------
+# Encoders for the re-encoded GOPs at the cut points, per source codec.
+# The parts must use the same codec as the copied middle to be joined without re-encoding.
+SMART_CUT_ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+KEYFRAME_SEARCH = 30  # seconds around each cut point searched for keyframes
+CUT_EPSILON = 0.0005  # seek half a millisecond early, so a frame exactly on a cut point is not lost to rounding
+
+
+def probe_video_stream(input_file: Path) -> dict:
+    """codec_name / pix_fmt of the first video stream, plus start_time (seconds) of the file"""
+    cmd = [FFPROBE_PATH, "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "stream=codec_name,pix_fmt:format=start_time", "-of", "json", str(input_file)]
+    info = json.loads(run(cmd).stdout)
+    video = dict((info.get("streams") or [{}])[0])
+    try:
+        video["start_time"] = float(info.get("format", {}).get("start_time"))
+    except (TypeError, ValueError):
+        video["start_time"] = 0.0
+    return video
+
+
+def find_keyframes(input_file: Path, start: float, end: float, offset: float = 0.0) -> list:
+    """
+    Keyframe times of the first video stream near start and end. Only the packet
+    headers of two small windows are read (no decoding), so this is quick even for
+    long segments.
+    start / end and the result are relative to the file start like -ss, offset is the
+    file's start_time (MPEG-TS / M2TS never start at 0): -read_intervals and pts_time
+    are absolute.
+    """
+    windows = [(start - 1, start + KEYFRAME_SEARCH), (end - KEYFRAME_SEARCH, end + 1)]
+    intervals = ",".join((f"{a + offset:.3f}" if a > 0 else "") + f"%{b + offset:.3f}" for a, b in windows)
+    cmd = [FFPROBE_PATH, "-v", "error", "-select_streams", "v:0", "-read_intervals", intervals,
+           "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(input_file)]
+    out = run(cmd).stdout
+    keyframes = set()
+    for line in out.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.add(round(float(pts) - offset, 6))
+    return sorted(keyframes)
+
+
+def smart_cut(input_file: Path, start: float, end: float, outfile: Path, log=print):
+    """
+    Frame accurate cut at near copy speed: only the partial GOPs before the first
+    and after the last keyframe inside [start, end] are re-encoded, the middle is
+    stream copied. The video parts are joined with the concat demuxer (MPEG-TS
+    parts keep their own SPS/PPS), audio is copied in one piece for the whole range.
+    Falls back to a full re-encode if there is no complete GOP in the segment or
+    the codec has no matching encoder.
+    """
+    video = probe_video_stream(input_file)
+    encoder = SMART_CUT_ENCODERS.get(video.get("codec_name"))
+    keyframes = find_keyframes(input_file, start, end, video["start_time"]) if encoder else []
+    inside = [k for k in keyframes if start <= k <= end]
+    k1 = inside[0] if inside else None
+    k2 = inside[-1] if inside else None
+    # k1 < start would copy frames from before the cut (and their keyframe gets dropped)
+    if not encoder or k1 is None or k1 < start or k2 - k1 < 1.0:
+        log("Smart cut not possible here, re-encoding the whole segment")
+        reencode_segment(input_file, start, end, outfile)
+        return
+
+    encode = ["-c:v", encoder, "-crf", "18", "-preset", "veryfast"]
+    if video.get("pix_fmt"):
+        encode += ["-pix_fmt", video["pix_fmt"]]
+
+    with tempfile.TemporaryDirectory(prefix="smartcut_") as tmp:
+        tmp = Path(tmp)
+        parts = []
+        video_only = ["-map", "0:v:0", "-an", "-sn", "-dn"]
+
+        if k1 - start > 0.001:
+            head = tmp / "head.ts"
+            part_start = start - CUT_EPSILON
+            cmd = [FFMPEG_PATH, "-v", "error", "-ss", f"{part_start:.4f}", "-i", str(input_file),
+                   "-t", f"{k1 - part_start:.4f}", *video_only, *encode, "-f", "mpegts", "-y", str(head)]
+            run(cmd)
+            parts.append(head)
+
+        # Middle: the copy seek lands on a keyframe before k1, -copypriorss 0 drops everything
+        # before k1. -t can't end it exactly (stream copy cuts on dts), so the segment muxer
+        # splits at k2 (first keyframe at/after the time, by pts) and only the first piece is used.
+        part_start = k1 - CUT_EPSILON
+        cmd = [FFMPEG_PATH, "-v", "error", "-ss", f"{part_start:.4f}", "-i", str(input_file),
+               "-t", f"{k2 - k1 + KEYFRAME_SEARCH:.4f}", *video_only, "-c:v", "copy", "-copypriorss", "0",
+               "-f", "segment", "-segment_format", "mpegts", "-segment_times", f"{k2 - k1:.4f}",
+               "-reset_timestamps", "1", "-y", str(tmp / "middle%d.ts")]
+        run(cmd)
+        parts.append(tmp / "middle0.ts")
+
+        if end - k2 > 0.001:
+            tail = tmp / "tail.ts"
+            part_start = k2 - CUT_EPSILON
+            cmd = [FFMPEG_PATH, "-v", "error", "-ss", f"{part_start:.4f}", "-i", str(input_file),
+                   "-t", f"{end - part_start:.4f}", *video_only, *encode, "-f", "mpegts", "-y", str(tail)]
+            run(cmd)
+            parts.append(tail)
+        log(f"Smart cut: re-encoded {k1 - start:.2f}s + {end - k2:.2f}s, copied {k2 - k1:.2f}s")
+
+        concat_list = tmp / "parts.txt"
+        concat_list.write_text("".join(f"file '{p.as_posix()}'\n" for p in parts), encoding="utf-8")
+        cmd = [FFMPEG_PATH, "-v", "error", "-f", "concat", "-safe", "0", "-i", str(concat_list),
+               "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", str(input_file),
+               "-map", "0:v:0", "-map", "1:a?", "-c", "copy", "-copypriorss", "0", "-y", str(outfile)]
+        run(cmd)
+
+
+# ---------------- Batch stills ----------------
+# Marks closer together than this are decoded in one pass instead of seeking again
+STILLS_DECODE_GAP = 5.0
+STILLS_PTS_SCALE = 10000  # stills are named by pts in 1/10 ms (fits the int frame number up to ~59 h)
+
+
+def group_stills(stills: list, gap: float = STILLS_DECODE_GAP) -> list:
+    """Sort (seconds, outfile) marks and group the ones that are at most gap seconds apart"""
+    groups = []
+    for still in sorted(stills, key=lambda s: s[0]):
+        if groups and still[0] - groups[-1][-1][0] <= gap:
+            groups[-1].append(still)
+        else:
+            groups.append([still])
+    return groups
+
+
+def extract_stills(input_file: Path, stills: list, log=print):
+    """
+    Extract many stills from one file with a single ffmpeg process. stills is a list
+    of (seconds, outfile). Each group of nearby marks is one input seek followed by
+    one decode pass whose select filter keeps the first frame at or after every mark
+    (the frame a single -ss extract gives). The frames are written with their pts
+    as file name, which maps them back to the marks; marks that fall on the same
+    frame get a copy.
+    """
+    groups = group_stills(stills)
+    ext = Path(stills[0][1]).suffix or ".jpg"
+    cmd = [FFMPEG_PATH, "-v", "error"]
+    filters = []
+    outputs = []
+    with tempfile.TemporaryDirectory(prefix="stills_", dir=Path(stills[0][1]).parent) as tmp:
+        tmp = Path(tmp)
+        for i, group in enumerate(groups):
+            seek = max(group[0][0] - CUT_EPSILON, 0)
+            cmd += ["-ss", f"{seek:.4f}", "-t", f"{group[-1][0] - seek + 1:.4f}", "-i", str(input_file)]
+            # after the input seek t starts at 0 on `seek`; prev_t is NAN on the first frame
+            marks = [seconds - seek - CUT_EPSILON for seconds, _ in group]
+            expr = "+".join(f"gte(t,{d:.4f})*(lt(prev_t,{d:.4f})+isnan(prev_t))" for d in marks)
+            filters.append(f"[{i}:v:0]select='{expr}',settb=1/{STILLS_PTS_SCALE}[g{i}]")
+            outputs += ["-map", f"[g{i}]", "-fps_mode", "passthrough", "-enc_time_base", "filter",
+                        "-frame_pts", "1", "-q:v", "2", str(tmp / f"g{i}_%d{ext}")]
+        cmd += ["-filter_complex", ";".join(filters)] + outputs
+        log(f"Extracting {len(stills)} stills with {len(groups)} seek(s) in one ffmpeg run")
+        run(cmd)
+
+        missing = []
+        for i, group in enumerate(groups):
+            frames = sorted((int(f.stem.split("_")[1]), f) for f in tmp.glob(f"g{i}_*{ext}"))
+            seek = max(group[0][0] - CUT_EPSILON, 0)
+            used = {}
+            for seconds, outfile in group:
+                threshold = (seconds - seek - CUT_EPSILON) * STILLS_PTS_SCALE - 0.5
+                frame = next((f for pts, f in frames if pts >= threshold), None)
+                if frame is None:
+                    missing.append(str(outfile))
+                elif frame in used:
+                    shutil.copyfile(used[frame], outfile)
+                else:
+                    shutil.move(str(frame), str(outfile))
+                    used[frame] = outfile
+    if missing:
+        raise RuntimeError(f"No frame for {len(missing)} still(s): " + ", ".join(missing))
+
+
+# ---------------- Analysis (cached per file) ----------------
+def cache_dir_for(input_file: Path, cache_root: Path) -> Path:
+    """Cache folder of one input file. A changed file (size / mtime) gets a new folder."""
+    st = input_file.stat()
+    key = f"{input_file.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+    return Path(cache_root) / hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+# Scene detection: ffmpeg's scene score (0..1) on downscaled frames
+SCENE_THRESHOLD = 0.3
+SCENE_THUMB_WIDTH = 160
+
+
+def scenes_index(input_file: Path, cache_root: Path) -> Path:
+    return cache_dir_for(input_file, cache_root) / f"scenes_{SCENE_THRESHOLD:.2f}.json"
+
+
+def load_scenes(input_file: Path, cache_root: Path):
+    """Cached scene list of input_file, None if it was not analysed yet"""
+    index = scenes_index(input_file, cache_root)
+    if not index.exists():
+        return None
+    with open(index, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def detect_scenes(input_file: Path, cache_root: Path, log=print) -> list:
+    """
+    Scene boundaries of input_file as [{"time": seconds, "thumb": path}, ...], the
+    first frame included. One decode pass: the frames are scaled to thumbnail size
+    first, select keeps every frame whose scene score exceeds SCENE_THRESHOLD and
+    writes it named by its pts in ms. The list is cached per file, the index is
+    written last, so an interrupted pass is simply run again.
+    """
+    scenes = load_scenes(input_file, cache_root)
+    if scenes is not None:
+        return scenes
+    index = scenes_index(input_file, cache_root)
+    thumbs = index.with_suffix("")
+    thumbs.mkdir(parents=True, exist_ok=True)
+    for old in thumbs.glob("*.jpg"):
+        old.unlink()
+
+    log(f"Detecting scenes in {input_file.name} ...")
+    cmd = [FFMPEG_PATH, "-v", "error", "-i", str(input_file), "-map", "0:v:0",
+           "-vf", f"scale={SCENE_THUMB_WIDTH}:-2,select='eq(n,0)+gt(scene,{SCENE_THRESHOLD})',settb=1/1000",
+           "-fps_mode", "passthrough", "-enc_time_base", "filter", "-frame_pts", "1", "-q:v", "4",
+           str(thumbs / "%d.jpg")]
+    run(cmd)
+
+    scenes = sorted(({"time": int(f.stem) / 1000, "thumb": str(f)} for f in thumbs.glob("*.jpg")),
+                    key=lambda scene: scene["time"])
+    tmp = index.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(scenes, f, indent=1)
+    os.replace(tmp, index)
+    log(f"{len(scenes)} scenes found")
+    return scenes
+
+
+# Timeline sprite: a thumbnail every SPRITE_INTERVAL seconds (wider for long files)
+SPRITE_INTERVAL = 10
+SPRITE_MAX_THUMBS = 300
+SPRITE_THUMB_WIDTH = 160
+SPRITE_COLUMNS = 20
+
+
+def probe_duration(input_file: Path) -> float:
+    cmd = [FFPROBE_PATH, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(input_file)]
+    out = run(cmd).stdout
+    return float(out.strip())
+
+
+def sprite_index(input_file: Path, cache_root: Path) -> Path:
+    return cache_dir_for(input_file, cache_root) / "sprite.json"
+
+
+def load_sprite(input_file: Path, cache_root: Path):
+    """Cached sprite description of input_file, None if it was not built yet"""
+    index = sprite_index(input_file, cache_root)
+    if not index.exists():
+        return None
+    with open(index, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_sprite(input_file: Path, cache_root: Path, log=print) -> dict:
+    """
+    Thumbnail sprite sheet of input_file in a single ffmpeg pass: only keyframes are
+    decoded (-skip_frame nokey), fps picks one per interval, scale + tile pack them
+    into one image of SPRITE_COLUMNS columns. Thumbnail i shows the time i * interval.
+    Cached per file like the scenes.
+    """
+    sprite = load_sprite(input_file, cache_root)
+    if sprite is not None:
+        return sprite
+    index = sprite_index(input_file, cache_root)
+    index.parent.mkdir(parents=True, exist_ok=True)
+    duration = probe_duration(input_file)
+    interval = max(SPRITE_INTERVAL, math.ceil(duration / SPRITE_MAX_THUMBS))
+    count = max(1, math.ceil(duration / interval))
+    columns = min(count, SPRITE_COLUMNS)
+    rows = math.ceil(count / columns)
+    image = index.with_suffix(".jpg")
+
+    log(f"Building timeline thumbnails for {input_file.name} ...")
+    cmd = [FFMPEG_PATH, "-v", "error", "-skip_frame", "nokey", "-i", str(input_file), "-map", "0:v:0",
+           "-vf", f"fps=1/{interval},scale={SPRITE_THUMB_WIDTH}:-2,tile={columns}x{rows}",
+           "-frames:v", "1", "-q:v", "4", "-y", str(image)]
+    run(cmd)
+
+    sprite = {"image": str(image), "duration": duration, "interval": interval,
+              "count": count, "columns": columns, "rows": rows}
+    tmp = index.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sprite, f, indent=1)
+    os.replace(tmp, index)
+    return sprite
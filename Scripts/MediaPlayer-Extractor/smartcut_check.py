@@ -0,0 +1,126 @@
+"""
+Smart cut regression check.
+
+Builds short H.264 test movies with ffmpeg's lavfi sources (fully offline), also
+copies that start at a non-zero time like MPEG-TS / M2TS recordings do, and checks
+that extractor_core finds the keyframes in -ss time and that smart_cut gives the
+same frames as a full re-encode: same first frame, same frame count (+-1), and
+the result decodes without errors.
+
+Usage:
+    python smartcut_check.py                       # offsets 0, 1.4 and 100 s
+    python smartcut_check.py --offsets 0 10.5 --keep checks
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import extractor_core as core
+
+GOP = 2.0              # seconds between keyframes of the test movie
+FPS = 25
+CUTS = [(5.0, 40.0), (3.36, 41.84), (10.0, 10.9)]  # the last one has no complete GOP
+MAX_PIXEL_DIFF = 1.0   # mean absolute difference of the first frame (0..255)
+
+
+def _ffmpeg(args):
+    subprocess.run([core.FFMPEG_PATH, "-hide_banner", "-v", "error", "-y"] + args, check=True)
+
+
+def make_source(path, duration=60):
+    _ffmpeg(["-f", "lavfi", "-i", f"testsrc2=d={duration}:s=640x360:r={FPS}",
+             "-f", "lavfi", "-i", f"sine=f=440:d={duration}",
+             "-c:v", "libx264", "-preset", "veryfast", "-g", str(int(GOP * FPS)), "-keyint_min", str(int(GOP * FPS)),
+             "-sc_threshold", "0", "-c:a", "aac", str(path)])
+
+
+def shifted_copy(src, dst, offset):
+    _ffmpeg(["-i", str(src), "-c", "copy", "-output_ts_offset", str(offset), str(dst)])
+
+
+def frame_count(path):
+    out = subprocess.run([core.FFPROBE_PATH, "-v", "error", "-select_streams", "v:0", "-count_frames",
+                          "-show_entries", "stream=nb_read_frames", "-of", "csv=p=0", str(path)],
+                         capture_output=True, text=True, check=True).stdout
+    return int(out.strip())
+
+
+def first_frame(path):
+    return subprocess.run([core.FFMPEG_PATH, "-v", "error", "-i", str(path), "-frames:v", "1",
+                           "-f", "rawvideo", "-pix_fmt", "gray", "-"], capture_output=True, check=True).stdout
+
+
+def decode_errors(path):
+    return subprocess.run([core.FFMPEG_PATH, "-v", "error", "-i", str(path), "-f", "null", "-"],
+                          capture_output=True, text=True).stderr.strip()
+
+
+def check_source(src, tmp):
+    """Returns a list of failure messages"""
+    failures = []
+    video = core.probe_video_stream(src)
+    # Keyframes must come back in -ss time, i.e. on the GOP grid of the unshifted movie
+    keyframes = core.find_keyframes(src, 5.0, 40.0, video["start_time"])
+    off_grid = [k for k in keyframes if abs(k / GOP - round(k / GOP)) > 0.05]
+    if not keyframes or off_grid:
+        failures.append(f"keyframes not relative to the file start: {keyframes[:6]}")
+
+    for start, end in CUTS:
+        smart, accurate = tmp / "smart.mkv", tmp / "accurate.mkv"
+        messages = []
+        core.smart_cut(src, start, end, smart, log=messages.append)
+        core.reencode_segment(src, start, end, accurate)
+        label = f"[{start}, {end}]"
+
+        a, b = first_frame(smart), first_frame(accurate)
+        diff = sum(abs(x - y) for x, y in zip(a, b)) / max(len(a), 1)
+        if len(a) != len(b) or diff > MAX_PIXEL_DIFF:
+            failures.append(f"{label}: first frame differs from the re-encode (mean diff {diff:.2f})")
+        frames, expected = frame_count(smart), frame_count(accurate)
+        if abs(frames - expected) > 1:
+            failures.append(f"{label}: {frames} frames, re-encode has {expected}")
+        errors = decode_errors(smart)
+        if errors:
+            failures.append(f"{label}: decode errors: {errors.splitlines()[0]}")
+        if end - start > 3 * GOP and not any(m.startswith("Smart cut:") for m in messages):
+            failures.append(f"{label}: fell back to a full re-encode ({'; '.join(messages)})")
+        print(f"  {label}: {'; '.join(messages)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check smart_cut against a full re-encode")
+    parser.add_argument("--offsets", nargs="+", type=float, default=[0.0, 1.4, 100.0],
+                        help="start times of the test movies in seconds")
+    parser.add_argument("--keep", help="folder for the test movies (kept). Default: temporary folder")
+    args = parser.parse_args()
+
+    work = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="smartcut_check_"))
+    work.mkdir(parents=True, exist_ok=True)
+    failed = False
+    try:
+        base = work / "source.mkv"
+        make_source(base)
+        for offset in args.offsets:
+            src = base
+            if offset:
+                src = work / f"source_{offset:g}.mkv"
+                shifted_copy(base, src, offset)
+            print(f"start_time {offset:g}s:")
+            failures = check_source(src, work)
+            for msg in failures:
+                print(f"  [FAIL] {msg}")
+            failed |= bool(failures)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    print("\nFAILED" if failed else "\nAll checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
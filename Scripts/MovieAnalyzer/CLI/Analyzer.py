@@ -1,11 +1,17 @@
-import json
+import os
+import queue
 import shutil
 import subprocess
 import sys
+import tempfile
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # Scripts/, for utils
+from utils import probe_cache
+
 DEFAULT_VIDEO = "h264"
 DEFAULT_AUDIO = "truehd"
 DEFAULT_SUBTITLE = "hdmv_pgs_subtitle"
@@ -17,6 +23,8 @@ AUDIO_BLACKLIST = {"mp3", "vorbis"}
 SUBTITLE_WHITELIST = {"hdmv_pgs_subtitle", "subrip"}
 SUBTITLE_BLACKLIST = {"dvd_subtitle"}
 
+MAX_JOBS = 2  # conversions running at the same time
+
 COLOR_MAP = {
     'whitelist': 'green',
     'blacklist': 'red',
@@ -30,11 +38,8 @@ def has_ffmpeg() -> bool:
     return shutil.which("ffmpeg") is not None
 
 def run_ffprobe(path: str) -> Dict[str, Any]:
-    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_streams", path]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
-    if proc.returncode != 0:
-        raise RuntimeError(proc.stderr.strip())
-    return json.loads(proc.stdout)
+    # Shared cache, ffprobe only runs again when the file changed
+    return probe_cache.probe(path)
 
 def extract_from_ffprobe(ffjson: Dict[str, Any]) -> Dict[str, List[Dict[str, Optional[str]]]]:
     streams = ffjson.get("streams", [])
@@ -66,7 +71,113 @@ def select_file(entry: tk.Entry):
         entry.delete(0, tk.END)
         entry.insert(0, filepath)
 
-def convert_stream(file_path: str, stream_index: str, stream_type: str):
+class ConversionJob:
+    """One ffmpeg run. status: Queued -> Running -> Done / Failed / Cancelled"""
+    def __init__(self, cmd: List[str], output_file: str, duration: Optional[float], item: str = ""):
+        self.cmd = cmd
+        self.output_file = output_file
+        self.duration = duration
+        self.item = item  # Treeview row the job belongs to
+        self.status = "Queued"
+        self.progress = 0.0
+        self.error = ""
+        self.cancelled = False
+        self.reported = False  # final state already shown to the user
+        self.proc: Optional[subprocess.Popen] = None
+
+def run_conversion(job: ConversionJob, notify=lambda job: None):
+    """
+    Run one job's ffmpeg command blocking (call it from a worker thread).
+    notify(job) is called on every status change and each percent of progress.
+    """
+    if job.cancelled:
+        job.status = "Cancelled"
+        notify(job)
+        return job
+    job.status = "Running"
+    notify(job)
+    cmd = job.cmd[:1] + ["-nostats", "-progress", "pipe:1"] + job.cmd[1:]
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8", errors="replace") as errlog:
+        # stderr goes to a file, so a chatty ffmpeg can never block on a full pipe
+        job.proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=errlog, text=True)
+        if job.cancelled:  # cancel came in between
+            job.proc.terminate()
+        for line in job.proc.stdout:
+            key, _, value = line.strip().partition("=")
+            if key == "out_time_us" and job.duration and value.isdigit():
+                progress = min(int(value) / 1e6 / job.duration, 1.0)
+                if progress - job.progress >= 0.01:
+                    job.progress = progress
+                    notify(job)
+        returncode = job.proc.wait()
+        errlog.seek(0)
+        job.error = errlog.read().strip()
+
+    if job.cancelled:
+        job.status = "Cancelled"
+    elif returncode == 0:
+        job.status, job.progress = "Done", 1.0
+    else:
+        job.status = "Failed"
+    if job.status != "Done" and os.path.exists(job.output_file):
+        try:
+            os.remove(job.output_file)  # no half written files
+        except OSError:
+            pass
+    notify(job)
+    return job
+
+class ConversionRunner:
+    """
+    Runs ConversionJobs on worker threads, at most max_jobs at once. ffmpeg reports
+    its position with -progress on stdout, every change is put on a queue and handed
+    to on_update(job) on the Tk thread (polled with after()).
+    """
+    def __init__(self, root: tk.Misc, on_update, max_jobs: int = MAX_JOBS):
+        self.root = root
+        self.on_update = on_update
+        self.executor = ThreadPoolExecutor(max_workers=max_jobs)
+        self.updates: "queue.Queue[ConversionJob]" = queue.Queue()
+        self.jobs: Dict[str, ConversionJob] = {}  # Treeview item -> job
+        self.root.after(100, self._poll)
+
+    def submit(self, job: ConversionJob) -> ConversionJob:
+        self.jobs[job.item] = job
+        self.executor.submit(self._run, job)
+        self.updates.put(job)
+        return job
+
+    def cancel(self, job: ConversionJob):
+        job.cancelled = True
+        if job.proc and job.proc.poll() is None:
+            job.proc.terminate()
+
+    def active(self, item: str) -> Optional[ConversionJob]:
+        job = self.jobs.get(item)
+        return job if job and job.status in ("Queued", "Running") else None
+
+    def shutdown(self):
+        for job in self.jobs.values():
+            self.cancel(job)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: ConversionJob):
+        run_conversion(job, self.updates.put)
+
+    def _poll(self):
+        changed = {}
+        try:
+            while True:
+                job = self.updates.get_nowait()
+                changed[id(job)] = job  # several updates of one job -> one call with its latest state
+        except queue.Empty:
+            pass
+        for job in changed.values():
+            self.on_update(job)
+        self.root.after(100, self._poll)
+
+def convert_stream(file_path: str, stream_index: str, stream_type: str, runner: ConversionRunner, item: str):
     if not has_ffmpeg():
         messagebox.showerror("Error", "ffmpeg is not installed or not in PATH.")
         return
@@ -85,21 +196,41 @@ def convert_stream(file_path: str, stream_index: str, stream_type: str):
         messagebox.showerror("Error", f"Unknown stream type: {stream_type}")
         return
 
-    stream_letter = {'Video': 'v', 'Audio': 'a', 'Subtitle': 's'}[stream_type]
+    # stream_index is the absolute ffprobe index, so -c:<index> (not -c:a:<index>)
     cmd = [
-        'ffmpeg', '-i', file_path,
+        'ffmpeg', '-y', '-v', 'error', '-i', file_path,
         '-map', '0',
         '-c', 'copy',
-        f'-c:{stream_letter}:{stream_index}', codec, '-strict', '-2'
+        f'-c:{stream_index}', codec, '-strict', '-2',
         '-map_metadata', '0',
         output_file
     ]
+    try:
+        duration = float(run_ffprobe(file_path).get("format", {}).get("duration") or 0) or None
+    except Exception:
+        duration = None  # no percentage, the job still runs
+    runner.submit(ConversionJob(cmd, output_file, duration, item))
 
-    proc = subprocess.run(cmd, text=True)
-    if proc.returncode == 0:
-        messagebox.showinfo("Success", f"Stream converted to {codec} and saved to {output_file}")
+def show_job(tree: ttk.Treeview, job: ConversionJob):
+    """Post a job's state into the Action column of its row"""
+    if not tree.exists(job.item):
+        return  # table was refreshed in the meantime
+    values = list(tree.item(job.item, "values"))
+    if job.status == "Running":
+        values[4] = f"{job.progress:.0%} (Cancel)" if job.duration else "Running (Cancel)"
+    elif job.status == "Queued":
+        values[4] = "Queued (Cancel)"
     else:
-        messagebox.showerror("Error", "Conversion failed.")
+        values[4] = job.status
+    tree.item(job.item, values=values)
+
+    if job.status not in ("Done", "Failed") or job.reported:
+        return
+    job.reported = True
+    if job.status == "Done":
+        messagebox.showinfo("Success", f"Stream converted and saved to {job.output_file}")
+    elif job.status == "Failed":
+        messagebox.showerror("Error", "Conversion failed.\n\n" + job.error[-1500:])
 
 def analyze_file(path: str, tree: ttk.Treeview):
     for row in tree.get_children():
@@ -124,16 +255,21 @@ def analyze_file(path: str, tree: ttk.Treeview):
         category = classify_codec(s['codec'], SUBTITLE_WHITELIST, SUBTITLE_BLACKLIST)
         tree.insert("", "end", values=(f"#{s['index']}", s['codec'], s['language'], "Subtitle", "Convert"), tags=(category,))
 
-def on_tree_click(event, tree: ttk.Treeview, entry: tk.Entry):
+def on_tree_click(event, tree: ttk.Treeview, entry: tk.Entry, runner: ConversionRunner):
     item = tree.identify_row(event.y)
     column = tree.identify_column(event.x)
     if not item:
         return
     if column == "#5":
+        job = runner.active(item)
+        if job:
+            if messagebox.askyesno("Cancel", f"Cancel conversion to {job.output_file}?"):
+                runner.cancel(job)
+            return
         values = tree.item(item, "values")
         index = values[0].lstrip('#')
         stream_type = values[3]
-        convert_stream(entry.get(), index, stream_type)
+        convert_stream(entry.get(), index, stream_type, runner, item)
 
 def main():
     root = tk.Tk()
@@ -159,11 +295,17 @@ def main():
     tree.tag_configure('blacklist', foreground=COLOR_MAP['blacklist'])
     tree.tag_configure('none', foreground=COLOR_MAP['none'])
 
-    tree.bind("<Button-1>", lambda e: on_tree_click(e, tree, entry))
+    runner = ConversionRunner(root, lambda job: show_job(tree, job))
+    tree.bind("<Button-1>", lambda e: on_tree_click(e, tree, entry, runner))
 
     analyze_btn = tk.Button(frame, text="Analyze", command=lambda: analyze_file(entry.get(), tree))
     analyze_btn.pack(side="left", padx=(5, 0))
 
+    def on_close():
+        runner.shutdown()
+        root.destroy()
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,336 @@
+"""
+Bulk remux planner.
+
+Probes every movie below a folder and works out the cheapest ffmpeg operation that
+makes it fit the codec policy:
+
+    nothing         all streams are fine and the file already is .mkv
+    remux           stream copy only (container change and/or dropped subtitles)
+    reencode_audio  stream copy, only the blacklisted audio tracks are re-encoded
+
+Subtitles are dropped when their codec is blacklisted or (with a language list from
+codecs.db) their language is not whitelisted. Blacklisted video is only reported,
+re-encoding video is not something to do in bulk.
+
+Before anything runs the plan is printed with an estimate of the data to move and the
+time it takes, based on the stream bitrates. --execute then runs it on a parallel job
+queue; the results go into a separate folder, the originals are never touched.
+
+Usage:
+    python remux_planner.py D:/Filme                       # plan only
+    python remux_planner.py D:/Filme --execute -j 3 -o E:/Remux
+    python remux_planner.py D:/Filme --policy-db ../GUI-1/codecs.db
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from Analyzer import (
+    AUDIO_BLACKLIST, AUDIO_WHITELIST, SUBTITLE_BLACKLIST, SUBTITLE_WHITELIST,
+    VIDEO_BLACKLIST, VIDEO_WHITELIST, MAX_JOBS, ConversionJob, run_conversion, run_ffprobe,
+)
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".m4v", ".ts", ".m2ts", ".webm", ".wmv", ".flv"}
+TARGET_CONTAINER = ".mkv"
+OUTPUT_DIR_NAME = "_remux"  # default output folder inside the scanned folder (skipped while scanning)
+
+AUDIO_TARGET = "aac"      # codec for re-encoded audio tracks (should be on the audio whitelist)
+AUDIO_BITRATE = "384k"
+SUBTITLE_CONVERT = {"mov_text": "srt"}  # mp4 text subtitles can't be copied into mkv
+
+# Estimate
+COPY_MB_PER_S = 120       # stream copy is disk bound: read + write speed of the drives
+AUDIO_SPEED = 100         # audio encoding runs about this many times faster than realtime
+PROBE_WORKERS = 8
+
+
+# -----------------------------
+# POLICY
+# -----------------------------
+def policy_from_sets() -> Dict[str, set]:
+    """Policy of the CLI analyzer"""
+    return {
+        "video_whitelist": set(VIDEO_WHITELIST), "video_blacklist": set(VIDEO_BLACKLIST),
+        "audio_whitelist": set(AUDIO_WHITELIST), "audio_blacklist": set(AUDIO_BLACKLIST),
+        "subtitle_whitelist": set(SUBTITLE_WHITELIST), "subtitle_blacklist": set(SUBTITLE_BLACKLIST),
+        "lang_sub_whitelist": set(),
+    }
+
+def policy_from_db(db_path: str) -> Dict[str, set]:
+    """Policy of the GUI analyzer (codecs.db), subtitle codec lists come from the CLI sets.
+    Raises ValueError if the file is no codecs.db of the current GUI analyzer."""
+    if not os.path.isfile(db_path):
+        raise ValueError(f"{db_path} not found")
+    policy = policy_from_sets()
+    db = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = {"whitelist", "blacklist"} - tables
+        if missing:
+            raise ValueError(f"{db_path} has no table {', '.join(sorted(missing))} "
+                             f"(not a codecs.db, or written by an old GUI analyzer: start it once to migrate)")
+        # Same lists as analyzer._select_list: rows without codec_type count for every type
+        for name, table, codec_type in (("video_whitelist", "whitelist", "video"),
+                                        ("video_blacklist", "blacklist", "video"),
+                                        ("audio_whitelist", "whitelist", "audio"),
+                                        ("audio_blacklist", "blacklist", "audio")):
+            rows = db.execute(f"SELECT codec FROM {table} WHERE codec_type = ? OR codec_type IS NULL", (codec_type,))
+            policy[name] = {row[0].lower() for row in rows}
+        if "lang_sub_whitelist" in tables:
+            policy["lang_sub_whitelist"] = {row[0].lower() for row in db.execute("SELECT lang FROM lang_sub_whitelist")}
+    finally:
+        db.close()
+    return policy
+
+# -----------------------------
+# PLANNING
+# -----------------------------
+class FilePlan:
+    def __init__(self, path: str, op: str, output: str = "", cmd: Optional[List[str]] = None,
+                 duration: float = 0.0, read_bytes: int = 0, write_bytes: int = 0, encode_seconds: float = 0.0):
+        self.path = path
+        self.op = op              # nothing / remux / reencode_audio / error
+        self.output = output
+        self.cmd = cmd or []
+        self.duration = duration
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+        self.encode_seconds = encode_seconds  # CPU time for re-encoding, the rest is I/O
+        self.actions: List[str] = []
+        self.notes: List[str] = []
+
+def _language(stream: Dict[str, Any]) -> str:
+    tags = stream.get("tags") or {}
+    return (tags.get("language") or tags.get("LANGUAGE") or "und").lower()
+
+def _bitrate(stream: Dict[str, Any]) -> Optional[int]:
+    """bits/s of a stream: ffprobe's bit_rate, or the BPS tag mkvmerge writes"""
+    tags = stream.get("tags") or {}
+    for value in (stream.get("bit_rate"), tags.get("BPS"), tags.get("BPS-eng")):
+        if value and str(value).isdigit():
+            return int(value)
+    return None
+
+def _parse_bitrate(value: str) -> int:
+    value = value.lower()
+    factor = {"k": 1000, "m": 1000 ** 2}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * factor)
+
+def plan_file(path: str, info: Dict[str, Any], policy: Dict[str, set], output: str) -> FilePlan:
+    streams = info.get("streams", [])
+    fmt = info.get("format", {})
+    duration = float(fmt.get("duration") or 0)
+    size = int(fmt.get("size") or os.path.getsize(path))
+    container_change = os.path.splitext(path)[1].lower() != TARGET_CONTAINER
+
+    plan = FilePlan(path, "nothing", duration=duration)
+    drop, reencode, convert_subs = set(), set(), {}
+    for s in streams:
+        idx, kind, codec = s.get("index"), s.get("codec_type"), (s.get("codec_name") or "").lower()
+        if kind == "video" and codec in policy["video_blacklist"]:
+            plan.notes.append(f"#{idx} video {codec} is blacklisted (not re-encoded)")
+        elif kind == "audio" and codec in policy["audio_blacklist"]:
+            reencode.add(idx)
+            plan.actions.append(f"#{idx} {codec} -> {AUDIO_TARGET}")
+        elif kind == "subtitle":
+            lang = _language(s)
+            if codec in policy["subtitle_blacklist"]:
+                drop.add(idx)
+                plan.actions.append(f"drop #{idx} {codec}")
+            elif policy["lang_sub_whitelist"] and lang != "und" and lang not in policy["lang_sub_whitelist"]:
+                drop.add(idx)
+                plan.actions.append(f"drop #{idx} {codec} ({lang})")
+            elif container_change and codec in SUBTITLE_CONVERT:
+                convert_subs[idx] = SUBTITLE_CONVERT[codec]
+        elif kind in ("data", "attachment") and container_change:
+            drop.add(idx)  # tmcd / chapter tracks of mp4 can't go into mkv
+            plan.notes.append(f"#{idx} {kind} stream not copied")
+
+    if reencode:
+        plan.op = "reencode_audio"
+    elif drop or container_change:
+        plan.op = "remux"
+    if plan.op == "nothing":
+        return plan
+    if container_change:
+        plan.actions.insert(0, f"{os.path.splitext(path)[1].lower() or '?'} -> {TARGET_CONTAINER}")
+
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", path, "-map", "0"]
+    for idx in sorted(drop):
+        cmd += ["-map", f"-0:{idx}"]
+    cmd += ["-c", "copy"]
+    # Output stream specifiers count the kept streams, not the input indices
+    kept = [s for s in streams if s.get("index") not in drop]
+    for out_idx, s in enumerate(kept):
+        if s.get("index") in reencode:
+            cmd += [f"-c:{out_idx}", AUDIO_TARGET, f"-b:{out_idx}", AUDIO_BITRATE]
+        elif s.get("index") in convert_subs:
+            cmd += [f"-c:{out_idx}", convert_subs[s.get("index")]]
+    cmd += ["-map_metadata", "0", "-map_chapters", "0", output]
+
+    # Estimate from stream bitrates, streams without one share what's left of the file
+    rates = {s.get("index"): _bitrate(s) for s in streams}
+    total_rate = size * 8 / duration if duration else 0
+    unknown = [i for i, r in rates.items() if r is None]
+    leftover = max(total_rate - sum(r for r in rates.values() if r), 0)
+    for i in unknown:
+        rates[i] = leftover / len(unknown)
+    out_rate = sum(rates[s.get("index")] for s in kept if s.get("index") not in reencode)
+    out_rate += len(reencode) * _parse_bitrate(AUDIO_BITRATE)
+
+    plan.output = output
+    plan.cmd = cmd
+    plan.read_bytes = size
+    plan.write_bytes = int(out_rate * duration / 8)
+    plan.encode_seconds = duration * len(reencode) / AUDIO_SPEED
+    return plan
+
+def find_movies(folder: str, skip: str) -> List[str]:
+    movies = []
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = [d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) != skip]
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                movies.append(os.path.join(dirpath, name))
+    return sorted(movies)
+
+def build_plan(folder: str, output_dir: str, policy: Dict[str, set]) -> List[FilePlan]:
+    """Probe all movies in parallel (ffprobe results are cached) and plan each one"""
+    movies = find_movies(folder, os.path.abspath(output_dir))
+    plans = []
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as pool:
+        futures = {pool.submit(run_ffprobe, path): path for path in movies}
+        for future in as_completed(futures):
+            path = futures[future]
+            rel = os.path.relpath(path, folder)
+            output = os.path.join(output_dir, os.path.splitext(rel)[0] + TARGET_CONTAINER)
+            try:
+                plans.append(plan_file(path, future.result(), policy, output))
+            except Exception as e:
+                plan = FilePlan(path, "error")
+                plan.notes.append(str(e).splitlines()[0] if str(e) else type(e).__name__)
+                plans.append(plan)
+    plans.sort(key=lambda p: p.path)
+    return plans
+
+
+# -----------------------------
+# OUTPUT
+# -----------------------------
+def _size(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+def _duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+def estimate(plans: List[FilePlan], jobs: int) -> Dict[str, float]:
+    """Copying is limited by the disks (does not get faster with more jobs),
+    re-encoding by the CPU (spreads over the jobs)."""
+    todo = [p for p in plans if p.cmd]
+    io_bytes = sum(p.read_bytes + p.write_bytes for p in todo)
+    io_seconds = io_bytes / (COPY_MB_PER_S * 1024 ** 2)
+    cpu_seconds = sum(p.encode_seconds for p in todo)
+    return {
+        "files": len(todo),
+        "read_bytes": sum(p.read_bytes for p in todo),
+        "write_bytes": sum(p.write_bytes for p in todo),
+        "seconds": max(io_seconds, cpu_seconds / max(jobs, 1)),
+    }
+
+def print_plan(plans: List[FilePlan], jobs: int):
+    counts: Dict[str, int] = {}
+    for plan in plans:
+        counts[plan.op] = counts.get(plan.op, 0) + 1
+        if plan.op == "nothing" and not plan.notes:
+            continue
+        print(f"[{plan.op}] {plan.path}")
+        for line in plan.actions:
+            print(f"    {line}")
+        for line in plan.notes:
+            print(f"    ! {line}")
+        if plan.cmd:
+            print(f"    -> {plan.output} (~{_size(plan.write_bytes)})")
+
+    est = estimate(plans, jobs)
+    print("\nSummary: " + ", ".join(f"{op}: {n}" for op, n in sorted(counts.items())))
+    print(f"To do: {est['files']} files, read {_size(est['read_bytes'])}, write ~{_size(est['write_bytes'])}, "
+          f"estimated {_duration(est['seconds'])} with {jobs} jobs")
+
+
+# -----------------------------
+# EXECUTION
+# -----------------------------
+def execute_plan(plans: List[FilePlan], jobs: int) -> List[ConversionJob]:
+    """Run all planned commands, at most jobs at once. Ctrl+C cancels the running ones."""
+    todo = [ConversionJob(p.cmd, p.output, p.duration or None, p.path) for p in plans if p.cmd]
+    lock = threading.Lock()
+    finished = [0]
+
+    def notify(job: ConversionJob):
+        if job.status in ("Done", "Failed", "Cancelled"):
+            with lock:
+                finished[0] += 1
+                print(f"[{finished[0]}/{len(todo)}] {job.status}: {job.item}")
+                if job.status == "Failed":
+                    print("    " + (job.error.splitlines() or ["ffmpeg failed"])[-1])
+
+    for job in todo:
+        os.makedirs(os.path.dirname(job.output_file) or ".", exist_ok=True)
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        futures = [pool.submit(run_conversion, job, notify) for job in todo]
+        for future in as_completed(futures):
+            future.result()
+    except KeyboardInterrupt:
+        print("\nCancelling ...")
+        for job in todo:
+            job.cancelled = True
+            if job.proc and job.proc.poll() is None:
+                job.proc.terminate()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return todo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan (and run) the minimal remux per movie for the codec policy")
+    parser.add_argument("folder", help="library folder")
+    parser.add_argument("-o", "--output", help=f"output folder (default: <folder>/{OUTPUT_DIR_NAME})")
+    parser.add_argument("-j", "--jobs", type=int, default=MAX_JOBS, help="ffmpeg jobs at once")
+    parser.add_argument("--policy-db", help="use the lists of the GUI analyzer (codecs.db)")
+    parser.add_argument("--execute", action="store_true", help="run the plan (default: only print it)")
+    args = parser.parse_args()
+
+    folder = os.path.abspath(args.folder)
+    output_dir = os.path.abspath(args.output or os.path.join(folder, OUTPUT_DIR_NAME))
+    try:
+        policy = policy_from_db(args.policy_db) if args.policy_db else policy_from_sets()
+    except (ValueError, sqlite3.DatabaseError) as e:
+        parser.error(f"--policy-db: {e}")
+    if AUDIO_TARGET not in policy["audio_whitelist"]:
+        print(f"Warning: re-encode target {AUDIO_TARGET} is not on the audio whitelist")
+
+    plans = build_plan(folder, output_dir, policy)
+    print_plan(plans, args.jobs)
+    if not args.execute:
+        print("\nNothing changed (use --execute to run the plan)")
+        return
+
+    results = execute_plan(plans, args.jobs)
+    failed = [job for job in results if job.status != "Done"]
+    print(f"\nDone: {len(results) - len(failed)} ok, {len(failed)} failed/cancelled -> {output_dir}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
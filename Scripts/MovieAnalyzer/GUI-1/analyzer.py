@@ -6,6 +6,11 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
 from fractions import Fraction
 import platform
+import time
+import sqlite3
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     import ctypes
@@ -13,6 +18,9 @@ except ImportError:
     ctypes = None
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(SCRIPT_DIR)))  # Scripts/, for utils
+from utils import probe_cache
+
 DB_DIR = os.path.join(SCRIPT_DIR, "db")
 os.makedirs(DB_DIR, exist_ok=True)
 
@@ -31,25 +39,175 @@ FONT_TITLE = ("Segoe UI Semibold", 14)
 FONT_NORMAL = ("Segoe UI", 11)
 FONT_BUTTON = ("Segoe UI", 10, "bold")
 
-DB_FILES = {
-    "video_whitelist": os.path.join(DB_DIR, "video_whitelist.json"),
-    "video_blacklist": os.path.join(DB_DIR, "video_blacklist.json"),
-    "audio_whitelist": os.path.join(DB_DIR, "audio_whitelist.json"),
-    "audio_blacklist": os.path.join(DB_DIR, "audio_blacklist.json"),
-    "lang_audio_whitelist": os.path.join(DB_DIR, "lang_audio_whitelist.json"),
-    "lang_sub_whitelist": os.path.join(DB_DIR, "lang_sub_whitelist.json"),
+MEDIA_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".flv", ".webm"}
+MAX_PROBE_WORKERS = 6  # parallel ffprobe calls in library mode
+
+DB_PATH = os.path.join(SCRIPT_DIR, "codecs.db")
+
+# Policy list -> (table, column, codec_type) in codecs.db. Video and audio codecs share the
+# existing whitelist/blacklist tables and are told apart by codec_type (NULL = not known yet,
+# such a codec shows up in both lists).
+LIST_TABLES = {
+    "video_whitelist": ("whitelist", "codec", "video"),
+    "video_blacklist": ("blacklist", "codec", "video"),
+    "audio_whitelist": ("whitelist", "codec", "audio"),
+    "audio_blacklist": ("blacklist", "codec", "audio"),
+    "lang_audio_whitelist": ("lang_audio_whitelist", "lang", None),
+    "lang_sub_whitelist": ("lang_sub_whitelist", "lang", None),
 }
 
+# Old JSON lists, only read once to import them into codecs.db
+DB_FILES = {name: os.path.join(DB_DIR, f"{name}.json") for name in LIST_TABLES}
+
+_db_lock = threading.Lock()  # one connection shared by the Tk thread and the probe workers
+
+def _select_list(name):
+    table, column, codec_type = LIST_TABLES[name]
+    if codec_type is None:
+        return f"SELECT {column} FROM {table}", ()
+    return f"SELECT {column} FROM {table} WHERE codec_type = ? OR codec_type IS NULL", (codec_type,)
+
+def _insert_list(db, name, values):
+    table, column, codec_type = LIST_TABLES[name]
+    if codec_type is None:
+        db.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", [(v,) for v in values])
+    else:
+        db.executemany(f"INSERT INTO {table} ({column}, codec_type) VALUES (?, ?) "
+                       f"ON CONFLICT ({column}) DO UPDATE SET codec_type = excluded.codec_type",
+                       [(v, codec_type) for v in values])
+
+def ffprobe_codec_types():
+    """{codec name: 'video' / 'audio' / 'subtitle'} from ffprobe -codecs"""
+    types = {"V": "video", "A": "audio", "S": "subtitle"}
+    out = subprocess.run(["ffprobe", "-hide_banner", "-codecs"], capture_output=True, text=True, check=True).stdout
+    result = {}
+    for line in out.splitlines():
+        parts = line.split(None, 2)
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][2] in types:
+            result[parts[1].lower()] = types[parts[0][2]]
+    return result
+
+def open_db():
+    db = sqlite3.connect(DB_PATH, check_same_thread=False)
+    for table in ("whitelist", "blacklist"):
+        db.execute(f"CREATE TABLE IF NOT EXISTS {table} (codec TEXT PRIMARY KEY, codec_type TEXT)")
+        if "codec_type" not in [row[1] for row in db.execute(f"PRAGMA table_info({table})")]:
+            db.execute(f"ALTER TABLE {table} ADD COLUMN codec_type TEXT")
+    for table in ("lang_audio_whitelist", "lang_sub_whitelist"):
+        db.execute(f"CREATE TABLE IF NOT EXISTS {table} (lang TEXT PRIMARY KEY)")
+    db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS probe_files (
+            path     TEXT PRIMARY KEY,
+            size     INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL
+        )""")
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS probe_streams (
+            path         TEXT NOT NULL,
+            stream_index INTEGER NOT NULL,
+            codec_type   TEXT,
+            codec        TEXT,
+            lang         TEXT,
+            PRIMARY KEY (path, stream_index)
+        )""")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_probe_streams_codec ON probe_streams (codec)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_probe_streams_lang ON probe_streams (lang)")
+
+    # Per-type tables of an earlier version: move their rows into whitelist/blacklist
+    existing = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for name in ("video_whitelist", "video_blacklist", "audio_whitelist", "audio_blacklist"):
+        if name in existing:
+            _insert_list(db, name, [row[0] for row in db.execute(f"SELECT codec FROM {name}")])
+            db.execute(f"DROP TABLE {name}")
+
+    if db.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone() is None:
+        for name, path in DB_FILES.items():
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            _insert_list(db, name, [item.lower() for item in items])
+        db.execute("INSERT INTO meta (key, value) VALUES ('json_imported', '1')")
+
+    # The original rows have no codec_type, ask ffprobe once which kind each codec is
+    if db.execute("SELECT 1 FROM meta WHERE key = 'codec_types_set'").fetchone() is None:
+        try:
+            types = ffprobe_codec_types()
+        except (OSError, subprocess.CalledProcessError):
+            types = None  # no ffprobe yet, try again next start
+        if types is not None:
+            for table in ("whitelist", "blacklist"):
+                untyped = [row[0] for row in db.execute(f"SELECT codec FROM {table} WHERE codec_type IS NULL")]
+                db.executemany(f"UPDATE {table} SET codec_type = ? WHERE codec = ?",
+                               [(types[c], c) for c in untyped if types.get(c) in ("video", "audio")])
+            db.execute("INSERT INTO meta (key, value) VALUES ('codec_types_set', '1')")
+    db.commit()
+    return db
+
+DB = open_db()
+
+class Policy:
+    """
+    Whitelists/blacklists as in-memory frozensets, so a lookup is a set membership test
+    instead of a query. Everything is re-read only when codecs.db was changed by another
+    connection (PRAGMA data_version), checked at most every RECHECK_SECONDS.
+    """
+    RECHECK_SECONDS = 1.0
+
+    def __init__(self):
+        self._sets = {}
+        self._version = None
+        self._checked = 0.0
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._sets and now - self._checked < self.RECHECK_SECONDS:
+            return
+        self._checked = now
+        with _db_lock:
+            version = DB.execute("PRAGMA data_version").fetchone()[0]
+            if not force and self._sets and version == self._version:
+                return
+            for name in LIST_TABLES:
+                self._sets[name] = frozenset(row[0].lower() for row in DB.execute(*_select_list(name)))
+        self._version = version
+
+    def get(self, name):
+        self.refresh()
+        return self._sets[name]
+
+    def codec_status(self, codec):
+        self.refresh()
+        codec_l = codec.lower()
+        if codec_l in self._sets['video_whitelist'] or codec_l in self._sets['audio_whitelist']:
+            return ("Supported", COLOR_SUPPORTED)
+        if codec_l in self._sets['video_blacklist'] or codec_l in self._sets['audio_blacklist']:
+            return ("Blacklisted", COLOR_BLACKLIST)
+        return ("Unknown", COLOR_UNKNOWN)
+
+    def lang_status(self, lang, category):
+        if lang.lower() in self.get(f"{category}_whitelist"):
+            return ("Supported", COLOR_SUPPORTED)
+        return ("Unknown", COLOR_UNKNOWN)
+
+POLICY = Policy()
+
 def load_list(name):
-    path = DB_FILES[name]
-    if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return sorted(POLICY.get(name))
+
+def add_to_list(name, value):
+    with _db_lock:
+        _insert_list(DB, name, [value.lower()])
+        DB.commit()
+    POLICY.refresh(force=True)
 
-def save_list(name, data):
-    with open(DB_FILES[name], "w", encoding="utf-8") as f:
-        json.dump(sorted(set(data)), f, indent=2)
+def remove_from_list(name, value):
+    table, column, _ = LIST_TABLES[name]
+    with _db_lock:
+        DB.execute(f"DELETE FROM {table} WHERE {column} = ?", (value.lower(),))
+        DB.commit()
+    POLICY.refresh(force=True)
 
 def check_ffprobe():
     try:
@@ -59,11 +217,43 @@ def check_ffprobe():
         return False
 
 def run_ffprobe(path):
-    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path]
-    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if res.returncode != 0:
-        raise RuntimeError(res.stderr.strip() or "ffprobe returned non-zero exit code")
-    return json.loads(res.stdout)
+    """ffprobe JSON of path, from the shared probe cache while the file is unchanged"""
+    return probe_cache.probe(path)
+
+def run_ffprobe_cached(path):
+    """run_ffprobe + keep the probe_streams index in codecs.db up to date (one row per stream)."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    info = run_ffprobe(path)
+    with _db_lock:
+        row = DB.execute("SELECT size, mtime_ns FROM probe_files WHERE path = ?", (path,)).fetchone()
+    if row == (st.st_size, st.st_mtime_ns):
+        return info
+
+    streams = [(path, s.get('index'), s.get('codec_type'), s.get('codec_name'),
+                ((s.get('tags') or {}).get('language') or "").lower())
+               for s in info.get('streams', [])]
+    with _db_lock:
+        DB.execute("INSERT OR REPLACE INTO probe_files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                   (path, st.st_size, st.st_mtime_ns))
+        DB.execute("DELETE FROM probe_streams WHERE path = ?", (path,))
+        DB.executemany("INSERT OR REPLACE INTO probe_streams (path, stream_index, codec_type, codec, lang) "
+                       "VALUES (?, ?, ?, ?, ?)", streams)
+        DB.commit()
+    return info
+
+def find_cached_streams(codec=None, lang=None, codec_type=None):
+    """Library-wide query over all probed files: [(path, stream_index, codec_type, codec, lang)]"""
+    where, args = [], []
+    for column, value in (("codec", codec), ("lang", lang), ("codec_type", codec_type)):
+        if value:
+            where.append(f"{column} = ?")
+            args.append(value.lower())
+    sql = "SELECT path, stream_index, codec_type, codec, lang FROM probe_streams"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    with _db_lock:
+        return DB.execute(sql + " ORDER BY path, stream_index", args).fetchall()
 
 def fps_to_float(r_frame_rate):
     try:
@@ -143,6 +333,7 @@ class MovieInfoApp(tk.Tk):
         top_frame = ttk.Frame(self, style="Main.TFrame")
         top_frame.pack(fill=tk.X, pady=10, padx=10)
         RoundedButton(top_frame, text="Choose Media File", command=self.open_file).pack(side=tk.LEFT)
+        RoundedButton(top_frame, text="Scan Library", command=self.open_library).pack(side=tk.LEFT, padx=(8,0))
         self.file_label = ttk.Label(top_frame, text="No file loaded", style="Title.TLabel", anchor='w')
         self.file_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(15,0))
 
@@ -230,9 +421,7 @@ class MovieInfoApp(tk.Tk):
         val = simpledialog.askstring("Add", f"Enter {category} to add to {list_type}:")
         if not val:
             return
-        data = load_list(f"{category}_{list_type}")
-        data.append(val.lower())
-        save_list(f"{category}_{list_type}", data)
+        add_to_list(f"{category}_{list_type}", val)
         self._refresh_list(category, listbox_frame)
 
     def _delete_item(self, category, listbox_frame):
@@ -248,38 +437,28 @@ class MovieInfoApp(tk.Tk):
             return
         val = listbox.get(sel[0]).lower()
         if "lang" in category:
-            data = load_list(f"{category}_whitelist")
-            if val in data:
-                data.remove(val)
-                save_list(f"{category}_whitelist", data)
+            remove_from_list(f"{category}_whitelist", val)
         else:
             for lt in ["whitelist", "blacklist"]:
-                data = load_list(f"{category}_{lt}")
-                if val in data:
-                    data.remove(val)
-                    save_list(f"{category}_{lt}", data)
+                remove_from_list(f"{category}_{lt}", val)
         self._refresh_list(category, listbox_frame)
 
     def _codec_status(self, codec):
-        codec_l = codec.lower()
-        if codec_l in load_list('video_whitelist') or codec_l in load_list('audio_whitelist'):
-            return ("Supported", COLOR_SUPPORTED)
-        if codec_l in load_list('video_blacklist') or codec_l in load_list('audio_blacklist'):
-            return ("Blacklisted", COLOR_BLACKLIST)
-        return ("Unknown", COLOR_UNKNOWN)
+        return POLICY.codec_status(codec)
 
     def _lang_status(self, lang, category):
-        whitelist = load_list(f"{category}_whitelist")
-        if lang.lower() in whitelist:
-            return ("Supported", COLOR_SUPPORTED)
-        return ("Unknown", COLOR_UNKNOWN)
+        return POLICY.lang_status(lang, category)
 
     def open_file(self):
         path = filedialog.askopenfilename(filetypes=[("Media files", "*.mp4 *.mkv *.avi *.mov *.flv *.webm"), ("All files", "*.*")])
         if not path: return
-        self.file_label.config(text=path)
         self._load_info(path)
 
+    def open_library(self):
+        folder = filedialog.askdirectory(title="Choose library folder")
+        if not folder: return
+        LibraryWindow(self, folder)
+
     def _clear_cards(self):
         for w in self.card_frame.winfo_children(): w.destroy()
         for w in self.subtitle_frame.winfo_children(): w.destroy()
@@ -309,9 +488,10 @@ class MovieInfoApp(tk.Tk):
             ttk.Label(card, text=extra_info, style="CardInfo.TLabel").pack(anchor='w', pady=(4,0))
 
     def _load_info(self, path):
+        self.file_label.config(text=path)
         self._clear_cards()
         try:
-            info = run_ffprobe(path)
+            info = run_ffprobe_cached(path)
         except Exception as e:
             messagebox.showerror('Error', f'ffprobe failed: {e}')
             return
@@ -346,5 +526,173 @@ class MovieInfoApp(tk.Tk):
             lang = s.get('tags', {}).get('language') if s.get('tags') else None
             self._create_card("Subtitle", codec, lang)
 
+class LibraryWindow(tk.Toplevel):
+    """Library mode: ffprobe every media file below a folder and list all streams in one table."""
+    COLUMNS = ("file", "type", "index", "codec", "language", "details", "status")
+    HEADINGS = ("File", "Type", "#", "Codec", "Language", "Details", "Status")
+    WIDTHS = (380, 70, 40, 90, 80, 220, 110)
+
+    def __init__(self, app, folder):
+        super().__init__(app)
+        self.app = app
+        self.folder = folder
+        self.title(f"Library - {folder}")
+        self.geometry("1200x700")
+        self.configure(bg=BG_DARK)
+
+        self.results = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=MAX_PROBE_WORKERS)
+        self.total = None  # unknown until the folder walk is done
+        self.done = 0
+        self.errors = 0
+        self.sort_reverse = {}
+        self.closed = False
+
+        self._build()
+        self.protocol("WM_DELETE_WINDOW", self._close)
+        threading.Thread(target=self._collect_files, daemon=True).start()
+        self.after(100, self._poll_results)
+
+    def _build(self):
+        s = self.app.style
+        s.configure("Library.Treeview", background=BG_CARD, fieldbackground=BG_CARD,
+                    foreground=COLOR_TEXT, font=FONT_NORMAL, rowheight=24)
+        s.configure("Library.Treeview.Heading", background=COLOR_HIGHLIGHT, foreground=COLOR_TEXT, font=FONT_BUTTON)
+        s.map("Library.Treeview", background=[("selected", COLOR_ACCENT)])
+
+        top = ttk.Frame(self, style="Main.TFrame")
+        top.pack(fill=tk.X, padx=10, pady=10)
+        self.status_label = ttk.Label(top, text="Searching files...", style="Title.TLabel", anchor='w')
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        frame = ttk.Frame(self, style="Card.TFrame", padding=4)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0,10))
+        self.tree = ttk.Treeview(frame, columns=self.COLUMNS, show="headings", style="Library.Treeview")
+        for col, heading, width in zip(self.COLUMNS, self.HEADINGS, self.WIDTHS):
+            self.tree.heading(col, text=heading, command=lambda c=col: self._sort_by(c))
+            self.tree.column(col, width=width, anchor='w', stretch=(col in ("file", "details")))
+        scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        self.tree.tag_configure("supported", background=COLOR_SUPPORTED, foreground="white")
+        self.tree.tag_configure("blacklisted", background=COLOR_BLACKLIST, foreground="white")
+        self.tree.tag_configure("unknown", background=COLOR_UNKNOWN, foreground="black")
+        self.tree.tag_configure("error", background=BG_CARD, foreground=COLOR_BLACKLIST)
+        # Double click opens the file in the main window
+        self.tree.bind("<Double-1>", self._open_selected)
+
+    # --- Worker side (no Tk calls here) ---
+    def _collect_files(self):
+        count = 0
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                if self.closed:
+                    return
+                if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+                    path = os.path.join(root, name)
+                    self.executor.submit(self._probe, path)
+                    count += 1
+        self.results.put(("total", count, None))
+
+    def _probe(self, path):
+        if self.closed:
+            return
+        try:
+            self.results.put(("ok", path, run_ffprobe_cached(path)))
+        except Exception as e:
+            self.results.put(("error", path, str(e)))
+
+    # --- Tk side ---
+    def _poll_results(self):
+        if self.closed:
+            return
+        # Insert a bounded batch per tick so the window stays responsive
+        for _ in range(200):
+            try:
+                kind, path, data = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "total":
+                self.total = path
+            elif kind == "ok":
+                self.done += 1
+                self._insert_streams(path, data)
+            else:
+                self.done += 1
+                self.errors += 1
+                self.tree.insert("", tk.END, values=(path, "-", "", "", "", data, "ffprobe failed"), tags=("error",))
+        self._update_status()
+        self.after(100, self._poll_results)
+
+    def _update_status(self):
+        total = "?" if self.total is None else self.total
+        text = f"Scanned {self.done} / {total} files"
+        if self.errors:
+            text += f" ({self.errors} errors)"
+        if self.total is not None and self.done >= self.total:
+            text += " - done"
+        self.status_label.config(text=text)
+
+    def _insert_streams(self, path, info):
+        rel = os.path.relpath(path, self.folder)
+        for stream in info.get('streams', []):
+            stype = stream.get('codec_type')
+            if stype not in ('video', 'audio', 'subtitle'):
+                continue
+            codec = stream.get('codec_name', 'unknown')
+            lang = (stream.get('tags') or {}).get('language') or ""
+            if stype == 'video':
+                fps = fps_to_float(stream.get('r_frame_rate'))
+                details = f"{stream.get('width', 0)}x{stream.get('height', 0)}"
+                if fps:
+                    details += f" @ {fps:.2f} fps"
+            elif stype == 'audio':
+                details = f"Channels: {stream.get('channels', '?')}, Sample Rate: {stream.get('sample_rate', '?')}"
+            else:
+                details = ""
+
+            status = self._stream_status(stype, codec, lang)
+            self.tree.insert("", tk.END, values=(rel, stype.capitalize(), stream.get('index', ''),
+                                                 codec, lang.upper(), details, status),
+                             tags=(status.split()[0].lower(),))
+
+    def _stream_status(self, stype, codec, lang):
+        if stype != 'subtitle':
+            codec_status, _ = self.app._codec_status(codec)
+            if codec_status != "Supported":
+                return codec_status
+        if stype in ('audio', 'subtitle') and lang:
+            lang_status, _ = self.app._lang_status(lang, 'lang_audio' if stype == 'audio' else 'lang_sub')
+            if lang_status != "Supported":
+                return "Unknown language"
+        return "Supported"
+
+    def _sort_by(self, col):
+        reverse = self.sort_reverse.get(col, False)
+        rows = [(self.tree.set(item, col), item) for item in self.tree.get_children("")]
+
+        def key(row):
+            value = row[0]
+            return (0, int(value), "") if str(value).isdigit() else (1, 0, str(value).lower())
+
+        rows.sort(key=key, reverse=reverse)
+        for pos, (_, item) in enumerate(rows):
+            self.tree.move(item, "", pos)
+        self.sort_reverse[col] = not reverse
+
+    def _open_selected(self, event):
+        item = self.tree.focus()
+        if not item:
+            return
+        rel = self.tree.set(item, "file")
+        self.app._load_info(os.path.join(self.folder, rel))
+
+    def _close(self):
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
 app = MovieInfoApp()
 app.mainloop()
@@ -1,10 +1,23 @@
 import os
+import asyncio
 import subprocess
 import json
+import re
+import sqlite3
+import hashlib
+import time
+import tempfile
+import heapq
+import queue
+import threading
+import sys
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Scripts/, for utils
+from utils import probe_cache
+
 # -----------------------------
 # CONFIGURATION
 # -----------------------------
@@ -12,56 +25,319 @@ VIDEO_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv', '.webm'}
 FFMPEG_PATH = "ffmpeg"
 FFPROBE_PATH = "ffprobe"
 MAX_THREADS = 4  # adjust to CPU cores
+WALK_THREADS = 8  # directories listed in parallel (helps a lot over SMB)
+MAX_PER_DEVICE = 1  # files scanned at once per disk/share (1-2 for HDDs, more for SSD/NVMe)
+DEVICE_LIMITS = {}  # per mount point overrides, e.g. {"D:\\": 4, "/mnt/nvme": 4}
+
+# Engine: "threads" = one blocking thread per running file,
+#         "asyncio" = probe -> validate -> record pipeline on one event loop
+ENGINE = "threads"
+PROBE_CONCURRENCY = 32    # asyncio: ffprobe calls at once (cheap, header only)
+VALIDATE_CONCURRENCY = 4  # asyncio: validation passes at once (heavy, reads the whole file)
+LOOKUP_THREADS = 8        # asyncio: database lookups at once (stat + partial hash, kept off the event loop)
+
+# Scan tiers:
+#   "fast" = demux only (no decoding) + packet timestamp continuity check
+#   "deep" = full decode with -xerror, catches bitstream corruption
+SCAN_MODE = "fast"
+HWACCEL = None          # deep mode only, e.g. "nvdec" / "cuda" / "auto"; None = software decoding
+DECODE_THREADS = 0      # decoder threads per stream, 0 = ffmpeg picks (all cores)
+SAMPLE_WINDOW = 10      # deep mode: seconds decoded per sample window
+SAMPLE_INTERVAL = None  # deep mode: e.g. 300 = one window every 5 min, None = decode everything
+GAP_TOLERANCE = 2.0     # fast mode: larger jumps in audio/video timestamps count as errors
+END_TOLERANCE = 5.0     # fast mode: audio/video ending earlier than this before the file end = truncated
+
+# Results database (incremental scans)
+DB_NAME = "cine_scan.db"        # stored in the scanned folder
+REPORT_NAME = "cine_scan_report.json"
+STREAM_NAME = "cine_scan_report.jsonl"  # append-only result stream, one JSON object per line
+WRITE_TXT = False               # render a .txt next to every movie (costs a random write per file on the media disk)
+USE_PARTIAL_HASH = True         # recognize renamed/moved files by content instead of re-decoding
+HASH_CHUNK = 1024 * 1024        # bytes hashed at start, middle and end of a file
 
 # -----------------------------
 # HELPER FUNCTIONS
 # -----------------------------
+def _probe_cmd(file_path):
+    return probe_cache.probe_cmd(file_path, FFPROBE_PATH)
+
 def get_media_info(file_path):
-    """Get media info using ffprobe."""
-    cmd = [FFPROBE_PATH, "-v", "error", "-show_streams", "-print_format", "json", str(file_path)]
+    """Get media info using ffprobe (shared cache, unchanged files are not probed again)."""
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return json.loads(result.stdout)
-    except subprocess.CalledProcessError:
+        return probe_cache.probe(file_path, FFPROBE_PATH)
+    except (RuntimeError, OSError, ValueError):
         return None
 
-def fast_decode_check(file_path, stream_index=None, stream_type=None):
+ERROR_STREAM_PATTERNS = (
+    re.compile(r"#0:(\d+)"),             # "[aist#0:1/ac3 @ ...]", "Error while decoding stream #0:1"
+    re.compile(r"\bstream (\d+)\b", re.I),  # "[mov,mp4,...] stream 1, offset 0x...: partial file"
+)
+PROGRESS_LINE = re.compile(r"^\w+=")
+
+CODEC_PREFIX = re.compile(r"^\[(\w+) @")  # "[h264 @ 0x...] error while decoding MB ..."
+
+def _error_stream_index(line, codec_streams=None):
     """
-    Perform a fast decode check using -c copy.
-    Returns (status, optional info string)
+    Return the input stream index an ffmpeg error line refers to, or None for file-level errors.
+    codec_streams maps codec names that occur only once in the file to their stream index.
     """
-    cmd = [FFMPEG_PATH, "-v", "-hwaccel nvdec", "error", "-i", str(file_path)]
-    if stream_index is not None:
-        cmd += ["-map", f"0:{stream_index}"]
-    cmd += ["-c", "copy", "-f", "null", "-"]
-    
-    try:
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return "Playable", None
-    except subprocess.CalledProcessError as e:
-        stderr = e.stderr
-        first_error_time = None
-        # Try to find approximate location from frame/time info
-        for line in stderr.splitlines():
-            if "time=" in line:
-                parts = line.split()
-                for part in parts:
-                    if part.startswith("time="):
-                        first_error_time = part.replace("time=", "")
-                        break
-            if first_error_time:
-                break
-        if first_error_time:
-            return "Partially Corrupted", f"first error at {first_error_time}"
+    if line.startswith(("[null", "[out#", "[vost#", "[aost#", "[sost#")):
+        # Output side, "stream 0" / "#0:0" there is the stream inside one of the null outputs
+        return None
+    for pattern in ERROR_STREAM_PATTERNS:
+        match = pattern.search(line)
+        if match:
+            return int(match.group(1))
+    match = CODEC_PREFIX.match(line)
+    if match and codec_streams and match.group(1) in codec_streams:
+        return codec_streams[match.group(1)]
+    return None
+
+def _unique_codecs(streams):
+    """{codec_name: stream index} for codecs used by exactly one stream"""
+    names = [s.get("codec_name") for s in streams]
+    return {s.get("codec_name"): s["index"] for s in streams if names.count(s.get("codec_name")) == 1}
+
+def _format_time(seconds):
+    """Seconds -> HH:MM:SS.mmm (same style as ffmpeg's out_time)"""
+    hours, rest = divmod(max(seconds, 0.0), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+def _parse_time(value):
+    """HH:MM:SS.micro -> seconds"""
+    hours, minutes, secs = value.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(secs)
+
+def _parse_ffmpeg_log(stderr, offset=0.0, codec_streams=None):
+    """
+    Parse ffmpeg stderr written with -progress pipe:2.
+    Progress and errors share stderr, so the out_time around an error line
+    is its approximate location. Errors before the first progress block get
+    the time of the next one. offset is added to all times (sample windows).
+    Returns (first_error {stream index: seconds or None}, file_error, file_error_time)
+    """
+    current_time = None
+    first_error = {}
+    file_error = False
+    file_error_time = None
+    for line in stderr.splitlines():
+        line = line.strip()
+        if not line or line.startswith("Last message repeated"):
+            continue
+        if PROGRESS_LINE.match(line):
+            if line.startswith("out_time=") and not line.startswith("out_time=00:00:00.000000"):
+                try:
+                    current_time = offset + _parse_time(line.split("=", 1)[1])
+                except ValueError:  # out_time=N/A
+                    continue
+                for index, error_time in first_error.items():
+                    if error_time is None:
+                        first_error[index] = current_time
+                if file_error and file_error_time is None:
+                    file_error_time = current_time
+            continue
+        index = _error_stream_index(line, codec_streams)
+        if index is None:
+            if not file_error:
+                file_error, file_error_time = True, current_time
+        elif index not in first_error:
+            first_error[index] = current_time
+    return first_error, file_error, file_error_time
+
+def _stream_status(stream, error_time, info=None):
+    """Map an error (or none) of a stream to (status, info)"""
+    if error_time is not None:
+        return "Partially Corrupted", info or f"first error at {_format_time(error_time)}"
+    if stream.get("codec_type") == "subtitle":
+        return "Not Fully Readable", None
+    return "Broken", "location unknown"
+
+def _decode_cmd(file_path, streams, start=None, length=None):
+    """ffmpeg command decoding the given streams into null outputs (deep mode)"""
+    cmd = [FFMPEG_PATH, "-hide_banner", "-nostats", "-v", "error", "-xerror",
+           "-progress", "pipe:2", "-threads", str(DECODE_THREADS)]
+    if HWACCEL:
+        cmd += ["-hwaccel", HWACCEL]
+    if start is not None:
+        cmd += ["-ss", str(start), "-t", str(length)]
+    cmd += ["-i", str(file_path)]
+    for stream in streams:
+        cmd += ["-map", f"0:{stream['index']}"]
+        if stream.get("codec_type") == "subtitle":
+            # Bitmap subtitles can't be re-encoded for the null muxer, demuxing has to do
+            cmd += ["-c", "copy"]
+        cmd += ["-f", "null", "-"]
+    return cmd
+
+def _decode_windows(duration):
+    """(start, length) pairs decoded in deep mode, (None, None) = whole file"""
+    if SAMPLE_INTERVAL and duration and duration > SAMPLE_WINDOW:
+        return [(float(t), SAMPLE_WINDOW) for t in range(0, int(duration), SAMPLE_INTERVAL)]
+    return [(None, None)]
+
+def _window_errors(stderr, returncode, start, codec_streams):
+    """Errors of one deep decode run: (first_error, file_error, file_error_time)"""
+    first_error, file_error, file_error_time = _parse_ffmpeg_log(stderr, start or 0.0, codec_streams)
+    # Non-zero exit without a usable message still means the file is damaged
+    if returncode != 0 and not file_error and not first_error:
+        file_error = True
+    if (file_error or first_error) and start is not None:
+        # No progress before the error: broken right at the window start
+        first_error = {i: start if t is None else t for i, t in first_error.items()}
+        if file_error and file_error_time is None:
+            file_error_time = start
+    return first_error, file_error, file_error_time
+
+def _deep_results(streams, first_error, file_error, file_error_time):
+    # -xerror stops the whole decode, streams without error were not checked to the end
+    stopped_at = file_error_time
+    if stopped_at is None:
+        stopped_at = min((t for t in first_error.values() if t is not None), default=None)
+    results = {}
+    for stream in streams:
+        index = stream["index"]
+        if index in first_error:
+            results[index] = _stream_status(stream, first_error[index])
+        elif file_error:
+            results[index] = _stream_status(stream, file_error_time)
+        elif first_error:
+            info = f"decode stopped at {_format_time(stopped_at)}" if stopped_at is not None else "decode stopped"
+            results[index] = ("Unchecked", info)
         else:
-            if stream_type == "subtitle":
-                return "Not Fully Readable", None
-            return "Broken", "location unknown"
+            results[index] = ("Playable", None)
+    return results
 
-def process_file(full_path):
-    """Process a single file and return results dict plus formatted string."""
+def deep_decode_check(file_path, streams, duration=None):
+    """
+    Full decode of all streams in one ffmpeg process per pass (-xerror stops at the
+    first error). With SAMPLE_INTERVAL only SAMPLE_WINDOW seconds every
+    SAMPLE_INTERVAL seconds are decoded.
+    Returns {stream_index: (status, optional info string)}
+    """
+    codec_streams = _unique_codecs(streams)
+    errors = ({}, False, None)
+    for start, length in _decode_windows(duration):
+        result = subprocess.run(_decode_cmd(file_path, streams, start, length),
+                                capture_output=True, text=True, errors="replace")
+        errors = _window_errors(result.stderr, result.returncode, start, codec_streams)
+        if errors[0] or errors[1]:
+            break
+    return _deep_results(streams, *errors)
+
+def _packet_cmd(file_path):
+    return [FFPROBE_PATH, "-v", "error",
+            "-show_entries", "packet=stream_index,pts_time,dts_time,duration_time",
+            "-of", "csv=p=0", str(file_path)]
+
+class PacketChecker:
+    """
+    Timestamp continuity check over ffprobe's packet list (fast mode). Lines are fed
+    one by one as ffprobe prints them, so a two hour movie is never held in memory.
+    """
+    def __init__(self, streams):
+        self.wanted = {s["index"]: s for s in streams}
+        self.state = {index: {"last_dts": None, "end": None, "issue": None} for index in self.wanted}
+
+    def feed(self, line):
+        fields = line.strip().split(",")
+        if len(fields) < 4 or not fields[0].isdigit():
+            return
+        index = int(fields[0])
+        st = self.state.get(index)
+        if st is None:
+            return
+        pts, dts, dur = (float(v) if v not in ("N/A", "") else None for v in fields[1:4])
+        ts = dts if dts is not None else pts
+        if ts is None:
+            return
+        if st["issue"] is None and self.wanted[index].get("codec_type") != "subtitle":
+            if dts is not None and st["last_dts"] is not None and dts < st["last_dts"]:
+                st["issue"] = (ts, f"timestamps jump back at {_format_time(ts)}")
+            elif st["end"] is not None and ts - st["end"] > GAP_TOLERANCE:
+                st["issue"] = (st["end"], f"timestamp gap at {_format_time(st['end'])} "
+                                          f"({ts - st['end']:.1f}s missing)")
+        if dts is not None:
+            st["last_dts"] = dts
+        st["end"] = max(st["end"] or ts, ts + (dur or 0.0))
+
+    def results(self, stderr, returncode, duration=None):
+        """Combine timestamp issues with ffprobe's errors: {stream_index: (status, info)}"""
+        codec_streams = _unique_codecs(self.wanted.values())
+        stream_errors = set()
+        file_error = returncode != 0
+        for line in stderr.splitlines():
+            line = line.strip()
+            if not line or line.startswith("Last message repeated"):
+                continue
+            index = _error_stream_index(line, codec_streams)
+            if index is None:
+                file_error = True
+            else:
+                stream_errors.add(index)
+
+        results = {}
+        for index, stream in self.wanted.items():
+            st = self.state[index]
+            issue = st["issue"]
+            if (issue is None and duration and st["end"] is not None
+                    and stream.get("codec_type") in ("video", "audio")
+                    and duration - st["end"] > END_TOLERANCE):
+                issue = (st["end"], f"stream ends at {_format_time(st['end'])} of {_format_time(duration)}")
+
+            if issue:
+                results[index] = _stream_status(stream, issue[0], issue[1])
+            elif index in stream_errors or file_error:
+                # Demuxer error without timestamp problem: last packet read is the best guess
+                results[index] = _stream_status(stream, st["end"])
+            elif st["end"] is None and stream.get("codec_type") != "subtitle":
+                results[index] = ("Broken", "no packets")
+            else:
+                results[index] = ("Playable", None)
+        return results
+
+def fast_packet_check(file_path, streams, duration=None):
+    """
+    Demux-only check of all streams in one ffprobe pass. Looks at every packet
+    timestamp: backwards jumps, gaps > GAP_TOLERANCE and audio/video streams
+    ending early count as errors, as do demuxer errors.
+    Returns {stream_index: (status, optional info string)}
+    """
+    checker = PacketChecker(streams)
+    with tempfile.TemporaryFile() as err_file:
+        proc = subprocess.Popen(_packet_cmd(file_path), stdout=subprocess.PIPE, stderr=err_file,
+                                text=True, errors="replace")
+        for line in proc.stdout:
+            checker.feed(line)
+        proc.wait()
+        err_file.seek(0)
+        stderr = err_file.read().decode("utf-8", errors="replace")
+    return checker.results(stderr, proc.returncode, duration)
+
+def validate_streams(file_path, streams, duration=None, mode=None):
+    """
+    Validate all given streams of a file in a single pass.
+    mode: "fast" (demux + timestamp check) or "deep" (full decode), default SCAN_MODE.
+    Returns {stream_index: (status, optional info string)}
+    """
+    if not streams:
+        return {}
+    if (mode or SCAN_MODE) == "deep":
+        return deep_decode_check(file_path, streams, duration)
+    return fast_packet_check(file_path, streams, duration)
+
+def _checked_streams(info):
+    """Streams worth validating and the container duration from ffprobe's info"""
+    checked = [s for s in info.get("streams", []) if s.get("codec_type") in ("video", "audio", "subtitle")]
+    try:
+        duration = float(info.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    return checked, duration
+
+def build_result(full_path, info, stream_results):
+    """Turn ffprobe info + validation results into the results dict and formatted string."""
     report_lines = [f"Analyzing: {full_path}\n"]
-    info = get_media_info(full_path)
     
     if not info or "streams" not in info:
         report_lines.append("File is unreadable (ffprobe failed)\n")
@@ -74,36 +350,29 @@ def process_file(full_path):
 
     video_status, video_info = "No Video Stream", None
     audio_status_list, subtitle_status_list = [], []
+    checked, _ = _checked_streams(info)
 
-    for stream in info.get("streams", []):
+    for stream in checked:
         codec_name = stream.get("codec_name", "unknown")
         index = stream.get("index", -1)
         stype = stream.get("codec_type", "unknown")
+        status, info_msg = stream_results[index]
 
         if stype == "video":
             report_lines.append(f" -> Validating video stream ({codec_name})...")
-            video_status, video_info = fast_decode_check(full_path, index, "video")
-            if video_info:
-                report_lines.append(f"{video_status.upper()} | {video_info}")
-            else:
-                report_lines.append(f"{video_status.upper()}")
+            video_status, video_info = status, info_msg
         elif stype == "audio":
             report_lines.append(f" -> Validating audio track {index} ({codec_name})...")
-            status, info_msg = fast_decode_check(full_path, index, "audio")
-            if info_msg:
-                report_lines.append(f"{status.upper()} | {info_msg}")
-            else:
-                report_lines.append(f"{status.upper()}")
             audio_status_list.append({"index": index, "codec": codec_name, "status": status})
-        elif stype == "subtitle":
+        else:
             report_lines.append(f" -> Validating subtitle track {index} ({codec_name})...")
-            status, info_msg = fast_decode_check(full_path, index, "subtitle")
-            if info_msg:
-                report_lines.append(f"{status.upper()} | {info_msg}")
-            else:
-                report_lines.append(f"{status.upper()}")
             subtitle_status_list.append({"index": index, "codec": codec_name, "status": status})
 
+        if info_msg:
+            report_lines.append(f"{status.upper()} | {info_msg}")
+        else:
+            report_lines.append(f"{status.upper()}")
+
     # Only do these checks if info exists
     streams = info.get("streams", [])
     if not any(s.get("codec_type") == "video" for s in streams):
@@ -121,45 +390,520 @@ def process_file(full_path):
         "subtitle_status": subtitle_status_list
     }, "\n".join(report_lines)
 
+def process_file(full_path, mode=None):
+    """Process a single file and return results dict plus formatted string."""
+    info = get_media_info(full_path)
+    if not info or "streams" not in info:
+        return build_result(full_path, info, {})
+
+    # One ffmpeg pass for all streams instead of one read per stream
+    checked, duration = _checked_streams(info)
+    return build_result(full_path, info, validate_streams(full_path, checked, duration, mode))
+
 
 # -----------------------------
-# MAIN SCAN FUNCTION
+# RESULTS DATABASE
 # -----------------------------
-def scan_folder(folder_path):
-    report, counts = [], {"Playable": 0, "Partially Corrupted": 0, "Broken": 0, "No Video Stream": 0}
-    files_to_scan = [Path(root) / f for root, _, files in os.walk(folder_path)
-                     for f in files if Path(f).suffix.lower() in VIDEO_EXTENSIONS]
+def open_results_db(db_path):
+    """Open (and create) the SQLite results database."""
+    db = sqlite3.connect(str(db_path))
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS results (
+            path       TEXT PRIMARY KEY,
+            size       INTEGER NOT NULL,
+            mtime_ns   INTEGER NOT NULL,
+            hash       TEXT,
+            mode       TEXT NOT NULL,
+            scanned_at REAL NOT NULL,
+            result     TEXT NOT NULL,
+            report     TEXT NOT NULL
+        )""")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_results_hash ON results (hash, size)")
+    db.commit()
+    return db
 
-    print(f"Found {len(files_to_scan)} video files to scan in {folder_path}\n")
+def partial_hash(file_path, size):
+    """Hash of size + first, middle and last HASH_CHUNK bytes. Cheap even for 60 GB remuxes."""
+    h = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(file_path, "rb") as f:
+        for offset in sorted({0, max(size // 2 - HASH_CHUNK // 2, 0), max(size - HASH_CHUNK, 0)}):
+            f.seek(offset)
+            h.update(f.read(HASH_CHUNK))
+    return h.hexdigest()
 
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_file = {executor.submit(process_file, f): f for f in files_to_scan}
+def _mode_covers(cached_mode, wanted_mode):
+    """A deep result is good enough for a fast scan, not the other way round."""
+    return cached_mode == wanted_mode or cached_mode == "deep"
 
-        for future in tqdm(as_completed(future_to_file), total=len(files_to_scan), desc="CineScan Progress"):
-            result, report_text = future.result()
-            report.append(result)
+def lookup_result(db, file_path, mode):
+    """
+    Look up a previous result for file_path.
+    Returns (result, report_text, moved_from, key). result is None if the file has to be scanned,
+    key = (size, mtime_ns, hash) is what store_result needs afterwards.
+    A row with the same size and hash only counts as moved if its old path is gone: a copy
+    next to the original is scanned, it may be damaged outside the hashed blocks.
+    """
+    st = file_path.stat()
+    row = db.execute("SELECT size, mtime_ns, hash, mode, result, report FROM results WHERE path = ?",
+                     (str(file_path),)).fetchone()
+    if row and row[0] == st.st_size and row[1] == st.st_mtime_ns and _mode_covers(row[3], mode):
+        return json.loads(row[4]), row[5], None, (row[0], row[1], row[2])
+
+    file_hash = partial_hash(file_path, st.st_size) if USE_PARTIAL_HASH else None
+    key = (st.st_size, st.st_mtime_ns, file_hash)
+    if file_hash:
+        for old_path, old_mode, result, report in db.execute(
+                "SELECT path, mode, result, report FROM results WHERE hash = ? AND size = ? AND path != ?",
+                (file_hash, st.st_size, str(file_path))):
+            if _mode_covers(old_mode, mode) and not Path(old_path).exists():
+                return json.loads(result), report, old_path, key
+    return None, None, None, key
+
+def store_result(db, file_path, key, mode, result, report_text):
+    size, mtime_ns, file_hash = key
+    db.execute("INSERT OR REPLACE INTO results (path, size, mtime_ns, hash, mode, scanned_at, result, report) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+               (str(file_path), size, mtime_ns, file_hash, mode, time.time(),
+                json.dumps(result), report_text))
 
-            # Save individual TXT file
-            movie_txt = Path(result["file"]).with_suffix(".txt")
+def prune_results(db, existing_paths):
+    """Remove rows of files that no longer exist in the scanned folder."""
+    keep = {str(p) for p in existing_paths}
+    stale = [(path,) for (path,) in db.execute("SELECT path FROM results") if path not in keep]
+    db.executemany("DELETE FROM results WHERE path = ?", stale)
+    db.commit()
+    return len(stale)
+
+def export_report(db, report_file):
+    """Write the combined JSON report from the database, one row at a time."""
+    count = 0
+    with open(report_file, "w", encoding="utf-8") as f:
+        f.write("[")
+        for (result,) in db.execute("SELECT result FROM results ORDER BY path"):
+            f.write(",\n" if count else "\n")
+            f.write(json.dumps(json.loads(result), indent=4))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    return count
+
+# -----------------------------
+# RESULT STREAM (JSON LINES)
+# -----------------------------
+def append_result(stream, result, report_text, mode):
+    """Append one result to the JSON Lines stream and flush it, so a crash loses nothing."""
+    record = dict(result, mode=mode, scanned_at=time.time(), report=report_text)
+    stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+    stream.flush()
+
+def read_result_stream(stream_path):
+    """Latest record per file from a JSON Lines stream. A half-written last line is skipped."""
+    records = {}
+    with open(stream_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["file"]] = record
+    return records
+
+def render_txt_reports(stream_path, files=None):
+    """Render the per-movie TXT reports from the result stream (optionally only for files)."""
+    written = 0
+    for file, record in read_result_stream(stream_path).items():
+        if files is not None and file not in files:
+            continue
+        movie_txt = Path(file).with_suffix(".txt")
+        try:
             with open(movie_txt, "w", encoding="utf-8") as f:
-                f.write(report_text)
-
-            # Update counts
-            status = result["video_status"]
-            if status in counts:
-                counts[status] += 1
-            elif status == "Playable" and all(a["status"]=="Playable" for a in result["audio_status"]):
-                counts["Playable"] +=1
-            else:
-                counts["Partially Corrupted"] +=1
+                f.write(record["report"])
+            written += 1
+        except OSError as e:
+            print(f"Could not write {movie_txt}: {e}")
+    return written
+
+# -----------------------------
+# DIRECTORY WALKER
+# -----------------------------
+def _list_dir(path):
+    """One scandir call: (video files, subdirectories)"""
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                        files.append(Path(entry.path))
+                except OSError:
+                    pass
+    except OSError:
+        pass  # unreadable folder, same as os.walk
+    return files, dirs
+
+def walk_videos(folder_path, workers=None):
+    """
+    Yield all video files below folder_path while the tree is still being listed.
+    Every directory is a scandir job for a pool of WALK_THREADS workers, so slow
+    network round trips overlap instead of adding up.
+    """
+    with ThreadPoolExecutor(max_workers=workers or WALK_THREADS) as pool:
+        listing = {pool.submit(_list_dir, folder_path)}
+        while listing:
+            done, listing = wait(listing, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs = future.result()
+                listing |= {pool.submit(_list_dir, d) for d in dirs}
+                yield from files
+
+class FileFeed:
+    """Runs walk_videos in a background thread and hands out files as they are discovered."""
+    def __init__(self, folder_path):
+        self.found = 0          # running count, final once finished is set
+        self.finished = False
+        self._queue = queue.Queue()
+        threading.Thread(target=self._walk, args=(folder_path,), daemon=True).start()
+
+    def _walk(self, folder_path):
+        try:
+            for f in walk_videos(folder_path):
+                self.found += 1
+                self._queue.put(f)
+        finally:
+            self._queue.put(None)
+
+    def take(self, block=False):
+        """Files discovered since the last call. block waits until there is at least one (or the end)."""
+        files = []
+        try:
+            item = self._queue.get(block)
+            while item is not None:
+                files.append(item)
+                item = self._queue.get_nowait()
+            self.finished = True
+        except queue.Empty:
+            pass
+        return files
+
+# -----------------------------
+# I/O SCHEDULER
+# -----------------------------
+def mount_point(file_path):
+    """Mount point / drive a file lives on."""
+    path = Path(file_path).resolve().parent
+    while not os.path.ismount(path) and path.parent != path:
+        path = path.parent
+    return str(path)
+
+def device_slot(file_path, stats):
+    """(st_dev, size) of a file; creates the per-device entry in stats on first sight."""
+    try:
+        st = file_path.stat()
+        dev, size = st.st_dev, st.st_size
+    except OSError:
+        dev, size = None, 0
+    if dev not in stats:
+        mount = mount_point(file_path) if dev is not None else "?"
+        # setdefault: the asyncio engine calls this from several lookup threads
+        stats.setdefault(dev, {"mount": mount, "limit": DEVICE_LIMITS.get(mount, MAX_PER_DEVICE),
+                               "active": 0, "files": 0, "bytes": 0, "start": None, "end": None})
+    return dev, size
+
+def _add_device_stats(st, size, started, finished):
+    st["files"] += 1
+    st["bytes"] += size
+    st["start"] = started if st["start"] is None else min(st["start"], started)
+    st["end"] = finished if st["end"] is None else max(st["end"], finished)
+
+def _timed_process(file_path, mode):
+    start = time.monotonic()
+    result, report_text = process_file(file_path, mode)
+    return result, report_text, start, time.monotonic()
+
+def scan_by_device(feed, mode, stats, admit):
+    """
+    Run process_file over the files coming out of feed (a FileFeed), grouped by
+    physical device (st_dev) so every disk/share gets at most MAX_PER_DEVICE (or
+    DEVICE_LIMITS) concurrent scans while MAX_THREADS keeps the overall limit.
+    Waiting files of a device are taken in path order so the disk reads folder by
+    folder instead of jumping around. admit(file) decides whether a discovered file
+    needs scanning at all.
+    Yields (file, result, report_text) as files complete, per-device throughput is
+    collected in the stats dict.
+    """
+    waiting = {}  # dev -> heap of (path string, size, file)
+    running = {}
+    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+        def fill():
+            # Round-robin over devices until every device is at its limit or the pool is full
+            submitted = True
+            while submitted and len(running) < MAX_THREADS:
+                submitted = False
+                for dev, heap in waiting.items():
+                    st = stats[dev]
+                    if heap and st["active"] < st["limit"] and len(running) < MAX_THREADS:
+                        _, size, f = heapq.heappop(heap)
+                        running[executor.submit(_timed_process, f, mode)] = (f, size, dev)
+                        st["active"] += 1
+                        submitted = True
+
+        while True:
+            if not feed.finished:
+                # Only wait for the directory walk when there is nothing else to do
+                idle = not running and not any(waiting.values())
+                for f in feed.take(block=idle):
+                    if admit(f):
+                        dev, size = device_slot(f, stats)
+                        heapq.heappush(waiting.setdefault(dev, []), (str(f), size, f))
+            fill()
+            if not running:
+                if feed.finished and not any(waiting.values()):
+                    break
+                continue
+
+            done, _ = wait(running, timeout=None if feed.finished else 0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                f, size, dev = running.pop(future)
+                st = stats[dev]
+                st["active"] -= 1
+                result, report_text, started, finished = future.result()
+                _add_device_stats(st, size, started, finished)
+                yield f, result, report_text
+
+def print_device_stats(stats):
+    for st in stats.values():
+        if not st["files"]:
+            continue
+        seconds = max(st["end"] - st["start"], 1e-6)
+        print(f"  {st['mount']}: {st['files']} files, {st['bytes'] / 1024**3:.1f} GB in {seconds:.0f}s "
+              f"-> {st['bytes'] / 1024**2 / seconds:.1f} MB/s ({seconds / st['files']:.1f}s/file, "
+              f"{st['limit']} parallel)")
+
+# -----------------------------
+# ASYNCIO ENGINE
+# -----------------------------
+async def _run_async(cmd):
+    """Run a command without blocking the event loop: (returncode, stdout, stderr)"""
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await proc.communicate()
+    return proc.returncode, stdout.decode("utf-8", errors="replace"), stderr.decode("utf-8", errors="replace")
+
+async def get_media_info_async(file_path):
+    try:
+        st = os.stat(file_path)
+        info = probe_cache.lookup(file_path, st)
+    except OSError:
+        return None
+    if info is not None:
+        return info
+    returncode, stdout, _ = await _run_async(_probe_cmd(file_path))
+    if returncode != 0:
+        return None
+    try:
+        info = json.loads(stdout)
+    except ValueError:
+        return None
+    probe_cache.store(file_path, info, st)
+    return info
+
+async def fast_packet_check_async(file_path, streams, duration=None):
+    """Async fast_packet_check, the packet list is parsed while ffprobe is still reading."""
+    checker = PacketChecker(streams)
+    proc = await asyncio.create_subprocess_exec(*_packet_cmd(file_path), stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.PIPE)
+    stderr_task = asyncio.ensure_future(proc.stderr.read())
+    async for line in proc.stdout:
+        checker.feed(line.decode("utf-8", errors="replace"))
+    stderr = (await stderr_task).decode("utf-8", errors="replace")
+    await proc.wait()
+    return checker.results(stderr, proc.returncode, duration)
+
+async def deep_decode_check_async(file_path, streams, duration=None):
+    codec_streams = _unique_codecs(streams)
+    errors = ({}, False, None)
+    for start, length in _decode_windows(duration):
+        returncode, _, stderr = await _run_async(_decode_cmd(file_path, streams, start, length))
+        errors = _window_errors(stderr, returncode, start, codec_streams)
+        if errors[0] or errors[1]:
+            break
+    return _deep_results(streams, *errors)
+
+async def validate_streams_async(file_path, streams, duration=None, mode=None):
+    if not streams:
+        return {}
+    if (mode or SCAN_MODE) == "deep":
+        return await deep_decode_check_async(file_path, streams, duration)
+    return await fast_packet_check_async(file_path, streams, duration)
+
+async def scan_async(feed, mode, stats, lookup, admit, on_result):
+    """
+    Probe -> validate -> record pipeline over the files coming out of feed. Probes
+    (PROBE_CONCURRENCY) and validations (VALIDATE_CONCURRENCY, and MAX_PER_DEVICE per
+    disk) have their own limits, so many cheap ffprobes overlap with a few heavy passes.
+    lookup(file) is the database check (stat, partial hash, SQLite) and runs in LOOKUP_THREADS
+    worker threads, admit(file, found) decides on its result whether a file needs scanning and
+    on_result(file, result, report_text) is the record stage. Those two run on the event loop thread.
+    """
+    loop = asyncio.get_running_loop()
+    lookup_pool = ThreadPoolExecutor(max_workers=LOOKUP_THREADS)
+    probe_limit = asyncio.Semaphore(PROBE_CONCURRENCY)
+    validate_limit = asyncio.Semaphore(VALIDATE_CONCURRENCY)
+    device_limits = {}
+
+    async def pipeline(f, size, dev):
+        async with probe_limit:
+            info = await get_media_info_async(f)
+
+        stream_results = {}
+        if info and "streams" in info:
+            checked, duration = _checked_streams(info)
+            # Device first, so a file waiting for its disk doesn't block a global slot
+            async with device_limits[dev], validate_limit:
+                started = time.monotonic()
+                stream_results = await validate_streams_async(f, checked, duration, mode)
+                _add_device_stats(stats[dev], size, started, time.monotonic())
+
+        result, report_text = build_result(f, info, stream_results)
+        on_result(f, result, report_text)
+
+    def check(f):
+        # Worker thread: everything that touches the disk before the pipeline
+        return lookup(f), device_slot(f, stats)
+
+    async def admit_and_scan(f):
+        found, (dev, size) = await loop.run_in_executor(lookup_pool, check, f)
+        if admit(f, found):
+            if dev not in device_limits:
+                device_limits[dev] = asyncio.Semaphore(stats[dev]["limit"])
+            await pipeline(f, size, dev)
+
+    jobs = []
+    try:
+        while not feed.finished:
+            # Files start their pipeline while the rest of the tree is still being listed
+            for f in await asyncio.to_thread(feed.take, True):
+                jobs.append(asyncio.ensure_future(admit_and_scan(f)))
+        await asyncio.gather(*jobs)
+    finally:
+        lookup_pool.shutdown()
+
+# -----------------------------
+# MAIN SCAN FUNCTION
+# -----------------------------
+def count_status(counts, result):
+    status = result["video_status"]
+    if status in counts:
+        counts[status] += 1
+    elif status == "Playable" and all(a["status"]=="Playable" for a in result["audio_status"]):
+        counts["Playable"] +=1
+    else:
+        counts["Partially Corrupted"] +=1
+
+def scan_folder(folder_path, mode=None, write_txt=None, engine=None):
+    mode = mode or SCAN_MODE
+    engine = engine or ENGINE
+    write_txt = WRITE_TXT if write_txt is None else write_txt
+    counts = {"Playable": 0, "Partially Corrupted": 0, "Broken": 0, "No Video Stream": 0}
+
+    print(f"Scanning {folder_path} ({mode} mode, {engine} engine)\n")
+
+    db_path = Path(folder_path) / DB_NAME
+    db = open_results_db(db_path)
+    lookup_dbs = threading.local()  # read connection per lookup thread
+    stream_path = Path(folder_path) / STREAM_NAME
+    stream = open(stream_path, "a", encoding="utf-8")
+    feed = FileFeed(folder_path)
+    progress = tqdm(total=0, desc="CineScan Progress")
+    files_to_scan, updated = [], set()
+    pending, unchanged, moved = {}, 0, 0
+    claimed = set()  # old paths whose result already went to a moved file
+
+    def tick():
+        # The total is a running estimate until the directory walk is done
+        progress.total = max(feed.found, progress.n + 1)
+        progress.update(1)
+
+    def lookup(f):
+        """lookup_result for a discovered file, thread-safe. None if it vanished or is unreadable."""
+        conn = getattr(lookup_dbs, "db", None)
+        if conn is None:
+            conn = lookup_dbs.db = sqlite3.connect(str(db_path))
+        try:
+            return lookup_result(conn, f, mode)
+        except OSError:
+            return None
+
+    def admit(f, found):
+        """Bookkeeping for a looked up file. True = needs scanning."""
+        nonlocal unchanged, moved
+        files_to_scan.append(f)
+        if found is None:
+            return False  # process_file would fail the same way
+        result, report_text, moved_from, key = found
+        if moved_from in claimed:
+            result = None  # two copies of a moved file were looked up at once, scan this one
+        if result is None:
+            pending[f] = key
+            return True
+        if moved_from:
+            claimed.add(moved_from)
+            # Same content under a new name: reuse the result, only fix the paths
+            result["file"] = str(f)
+            report_text = report_text.replace(moved_from, str(f))
+            db.execute("DELETE FROM results WHERE path = ?", (moved_from,))  # can't be inherited twice
+            store_result(db, f, key, mode, result, report_text)
+            db.commit()
+            append_result(stream, result, report_text, mode)
+            updated.add(str(f))
+            moved += 1
+        else:
+            unchanged += 1
+        count_status(counts, result)
+        tick()
+        return False
+
+    def record(file_path, result, report_text):
+        # Both are written as soon as a file is done, an interrupted scan loses nothing
+        append_result(stream, result, report_text, mode)
+        store_result(db, file_path, pending[file_path], mode, result, report_text)
+        db.commit()
+        updated.add(str(file_path))
+        count_status(counts, result)
+        tick()
+
+    device_stats = {}
+    if engine == "asyncio":
+        asyncio.run(scan_async(feed, mode, device_stats, lookup, admit, record))
+    else:
+        admit_now = lambda f: admit(f, lookup(f))
+        for file_path, result, report_text in scan_by_device(feed, mode, device_stats, admit_now):
+            record(file_path, result, report_text)
+    progress.total = progress.n
+    progress.close()
+    stream.close()
+
+    print(f"\nFound {len(files_to_scan)} video files: {unchanged} unchanged, "
+          f"{moved} renamed/moved, {len(pending)} scanned")
+
+    removed = prune_results(db, files_to_scan)
 
     # Save combined report
-    report_file = Path(folder_path) / "cine_scan_report.json"
-    with open(report_file, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=4)
+    report_file = Path(folder_path) / REPORT_NAME
+    export_report(db, report_file)
+    db.close()
 
     print("\nScan complete!")
+    if any(st["files"] for st in device_stats.values()):
+        print("Throughput per device:")
+        print_device_stats(device_stats)
+    if removed:
+        print(f"Removed {removed} deleted files from the database")
     print(f"Combined report saved to: {report_file}")
+    print(f"Result stream: {stream_path}")
+    if write_txt and updated:
+        print(f"TXT reports written: {render_txt_reports(stream_path, updated)}")
     print(f"Summary: {counts}")
 
 # -----------------------------
@@ -167,4 +911,6 @@ def scan_folder(folder_path):
 # -----------------------------
 if __name__ == "__main__":
     folder_to_scan = input("Enter folder path to scan: ").strip()
-    scan_folder(folder_to_scan)
+    scan_mode = input(f"Scan mode - fast (demux) / deep (full decode) [{SCAN_MODE}]: ").strip().lower() or SCAN_MODE
+    txt = input("Write a TXT report next to each movie? (y/N): ").strip().lower() == "y"
+    scan_folder(folder_to_scan, scan_mode, txt)
@@ -0,0 +1,218 @@
+"""
+CineScan benchmark / regression harness.
+
+Builds a small corpus of synthetic movies with ffmpeg's lavfi sources (fully offline):
+clean files plus truncated, bit-flipped, header-damaged and video-less variants.
+Then runs process_file and/or scan_folder over it and reports files/s, MB/s and the
+confusion matrix of expected damage vs. reported video_status.
+
+Usage:
+    python cinescan_bench.py                          # fast + deep, process_file + scan_folder
+    python cinescan_bench.py --modes fast --runners scan --engine asyncio
+    python cinescan_bench.py --save baseline.json
+    python cinescan_bench.py --compare baseline.json  # exit code 1 on regressions
+"""
+import argparse
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import CineScan
+
+KINDS = ["clean", "truncated", "bitflip", "header", "no_video"]
+
+# video_status values that count as a correct detection per kind
+EXPECTED = {
+    "clean": {"Playable"},
+    "truncated": {"Partially Corrupted", "Broken"},
+    "bitflip": {"Partially Corrupted", "Broken"},
+    "header": {"Broken"},
+    "no_video": {"No Video Stream"},
+}
+
+THROUGHPUT_TOLERANCE = 0.8  # --compare: slower than 80% of the baseline = regression
+
+
+# -----------------------------
+# CORPUS
+# -----------------------------
+def _ffmpeg(args):
+    cmd = [CineScan.FFMPEG_PATH, "-hide_banner", "-v", "error", "-y"] + args
+    subprocess.run(cmd, check=True)
+
+def make_source(path, duration, size, with_video=True):
+    """Encode a test movie: testsrc2 video (optional) + two sine audio tracks."""
+    args = []
+    if with_video:
+        args += ["-f", "lavfi", "-i", f"testsrc2=d={duration}:s={size}:r=25"]
+    args += ["-f", "lavfi", "-i", f"sine=f=440:d={duration}",
+             "-f", "lavfi", "-i", f"sine=f=660:d={duration}"]
+    inputs = 3 if with_video else 2
+    for i in range(inputs):
+        args += ["-map", str(i)]
+    if with_video:
+        args += ["-c:v", "libx264", "-preset", "veryfast", "-g", "50"]
+    args += ["-c:a", "ac3", "-b:a", "192k", str(path)]
+    _ffmpeg(args)
+
+def truncate(src, dst, keep=0.6):
+    data = Path(src).read_bytes()
+    Path(dst).write_bytes(data[:int(len(data) * keep)])
+
+def bitflip(src, dst, rng, flips=40):
+    """Flip bytes in the payload (the first 10% with the headers stays intact)."""
+    data = bytearray(Path(src).read_bytes())
+    for _ in range(flips):
+        pos = rng.randrange(len(data) // 10, len(data))
+        data[pos] ^= 0xFF
+    Path(dst).write_bytes(bytes(data))
+
+def damage_header(src, dst, length=4096):
+    data = bytearray(Path(src).read_bytes())
+    data[:length] = bytes(length)
+    Path(dst).write_bytes(bytes(data))
+
+def build_corpus(corpus_dir, count=3, duration=20, size="640x360", seed=1):
+    """Create count files per kind. Returns {file path: kind}"""
+    rng = random.Random(seed)
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    expected = {}
+    for i in range(count):
+        ext = ".mkv" if i % 2 == 0 else ".mp4"
+        clean = corpus_dir / f"clean_{i}{ext}"
+        make_source(clean, duration, size)
+        expected[str(clean)] = "clean"
+
+        for kind, damage in (("truncated", truncate),
+                             ("bitflip", lambda s, d: bitflip(s, d, rng)),
+                             ("header", damage_header)):
+            target = corpus_dir / f"{kind}_{i}{ext}"
+            damage(clean, target)
+            expected[str(target)] = kind
+
+        no_video = corpus_dir / f"no_video_{i}{ext}"
+        make_source(no_video, duration, size, with_video=False)
+        expected[str(no_video)] = "no_video"
+    return expected
+
+
+# -----------------------------
+# RUNNERS
+# -----------------------------
+def run_process_file(files, mode):
+    """Call process_file file by file. Returns {file: video_status}"""
+    return {f: CineScan.process_file(Path(f), mode)[0]["video_status"] for f in files}
+
+def run_scan_folder(corpus_dir, mode, engine):
+    """Full scan_folder pipeline from an empty database. Returns {file: video_status}"""
+    for name in (CineScan.DB_NAME, CineScan.REPORT_NAME, CineScan.STREAM_NAME):
+        (Path(corpus_dir) / name).unlink(missing_ok=True)
+    CineScan.scan_folder(str(corpus_dir), mode, write_txt=False, engine=engine)
+    with open(Path(corpus_dir) / CineScan.REPORT_NAME, "r", encoding="utf-8") as f:
+        return {r["file"]: r["video_status"] for r in json.load(f)}
+
+def evaluate(expected, statuses, seconds, total_bytes):
+    matrix = {kind: {} for kind in KINDS}
+    correct = 0
+    for f, kind in expected.items():
+        status = statuses.get(f, "Missing")
+        matrix[kind][status] = matrix[kind].get(status, 0) + 1
+        correct += status in EXPECTED[kind]
+    return {
+        "files": len(expected),
+        "seconds": seconds,
+        "files_per_s": len(expected) / seconds if seconds else 0.0,
+        "mb_per_s": total_bytes / 1024**2 / seconds if seconds else 0.0,
+        "accuracy": correct / len(expected) if expected else 0.0,
+        "matrix": matrix,
+    }
+
+def print_result(name, res):
+    print(f"\n=== {name} ===")
+    print(f"{res['files']} files in {res['seconds']:.1f}s -> {res['files_per_s']:.2f} files/s, "
+          f"{res['mb_per_s']:.1f} MB/s, accuracy {res['accuracy']:.0%}")
+    statuses = sorted({s for row in res["matrix"].values() for s in row})
+    print(f"{'expected':<12}" + "".join(f"{s:>22}" for s in statuses))
+    for kind in KINDS:
+        row = res["matrix"][kind]
+        print(f"{kind:<12}" + "".join(f"{row.get(s, 0):>22}" for s in statuses))
+
+def compare(results, baseline):
+    """Print differences to a saved run. Returns True if something regressed."""
+    regressed = False
+    print("\n=== Comparison with baseline ===")
+    for name, res in results.items():
+        old = baseline.get(name)
+        if not old:
+            print(f"{name}: not in baseline")
+            continue
+        speed = res["files_per_s"] / old["files_per_s"] if old["files_per_s"] else 1.0
+        notes = []
+        if res["accuracy"] < old["accuracy"]:
+            notes.append(f"accuracy {old['accuracy']:.0%} -> {res['accuracy']:.0%}")
+        if speed < THROUGHPUT_TOLERANCE:
+            notes.append(f"throughput {speed:.0%} of baseline")
+        if res["matrix"] != old["matrix"]:
+            notes.append("confusion matrix changed")
+        regressed |= bool(notes) and (res["accuracy"] < old["accuracy"] or speed < THROUGHPUT_TOLERANCE)
+        print(f"{name}: {speed:.0%} speed, " + ("; ".join(notes) if notes else "ok"))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CineScan throughput and detection benchmark")
+    parser.add_argument("--corpus", help="corpus folder (kept). Default: temporary folder")
+    parser.add_argument("--count", type=int, default=3, help="files per damage kind")
+    parser.add_argument("--duration", type=int, default=20, help="seconds per test movie")
+    parser.add_argument("--size", default="640x360")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--modes", nargs="+", default=["fast", "deep"], choices=["fast", "deep"])
+    parser.add_argument("--runners", nargs="+", default=["process", "scan"], choices=["process", "scan"])
+    parser.add_argument("--engine", default=CineScan.ENGINE, choices=["threads", "asyncio"])
+    parser.add_argument("--save", help="write results as JSON (baseline for --compare)")
+    parser.add_argument("--compare", help="baseline JSON from --save")
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus) if args.corpus else Path(tempfile.mkdtemp(prefix="cinescan_bench_"))
+    try:
+        print(f"Building corpus in {corpus_dir} ...")
+        expected = build_corpus(corpus_dir, args.count, args.duration, args.size, args.seed)
+        total_bytes = sum(Path(f).stat().st_size for f in expected)
+        print(f"{len(expected)} files, {total_bytes / 1024**2:.1f} MB")
+
+        results = {}
+        for mode in args.modes:
+            for runner in args.runners:
+                start = time.perf_counter()
+                if runner == "process":
+                    name = f"{mode}/process_file"
+                    statuses = run_process_file(list(expected), mode)
+                else:
+                    name = f"{mode}/scan_folder[{args.engine}]"
+                    statuses = run_scan_folder(corpus_dir, mode, args.engine)
+                results[name] = evaluate(expected, statuses, time.perf_counter() - start, total_bytes)
+                print_result(name, results[name])
+    finally:
+        if not args.corpus:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
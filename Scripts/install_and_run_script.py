@@ -69,24 +69,34 @@ def get_imports_from_file(filepath: Path) -> set:
                 imports.add(node.module.split('.')[0])
     return imports
 
-def resolve_local_path(root: Path, import_name: str) -> Path:
+def resolve_local_path(root: Path, import_name: str, start_dir: Path = None) -> Path:
     """
     Versucht herauszufinden, ob ein Import lokal existiert.
     Z.B. import_name='utils.pdf' -> sucht nach 'root/utils/pdf.py'
+    Mit start_dir wird zuerst im Ordner der importierenden Datei und in dessen
+    Elternordnern bis root gesucht (Hilfsmodule neben dem Tool, z.B. extractor_core.py).
     """
     # 1. Ersetze Punkte durch Pfadtrenner (utils.pdf -> utils/pdf)
     rel_path = import_name.replace('.', os.sep)
-    
-    # Check 1: Ist es eine .py Datei? (utils/pdf.py)
-    candidate_py = root / (rel_path + ".py")
-    if candidate_py.exists():
-        return candidate_py
-    
-    # Check 2: Ist es ein Package? (utils/pdf/__init__.py)
-    candidate_init = root / rel_path / "__init__.py"
-    if candidate_init.exists():
-        return candidate_init
-    
+
+    folders = []
+    folder = start_dir
+    while folder is not None and root in folder.parents:
+        folders.append(folder)
+        folder = folder.parent
+    folders.append(root)
+
+    for folder in folders:
+        # Check 1: Ist es eine .py Datei? (utils/pdf.py)
+        candidate_py = folder / (rel_path + ".py")
+        if candidate_py.exists():
+            return candidate_py
+
+        # Check 2: Ist es ein Package? (utils/pdf/__init__.py)
+        candidate_init = folder / rel_path / "__init__.py"
+        if candidate_init.exists():
+            return candidate_init
+
     return None
 
 def scan_dependencies_recursive(start_file: Path):
@@ -111,7 +121,7 @@ def scan_dependencies_recursive(start_file: Path):
                 continue
             
             # Prüfen: Ist das ein lokaler Import?
-            local_path = resolve_local_path(ROOT, imp)
+            local_path = resolve_local_path(ROOT, imp, current_file.parent)
             
             if local_path:
                 # Ja -> Zur Queue hinzufügen, falls noch nicht gescannt
@@ -205,7 +215,9 @@ def run_tool(choice: str):
     
     print(f"{Colors.GREEN}>>> Starte {module_name}...{Colors.RESET}\n")
     try:
-        subprocess.run([sys.executable, "-m", module_name], check=False)
+        # Als Skript starten (nicht -m), damit der Ordner des Tools auf dem Pfad liegt
+        # und Hilfsmodule daneben (import extractor_core) gefunden werden
+        subprocess.run([sys.executable, str(file_path)], check=False)
     except KeyboardInterrupt:
         print("\nBeendet.")
 
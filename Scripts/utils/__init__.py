@@ -0,0 +1 @@
+"""Helpers shared by several tools. The tools put Scripts/ on sys.path and import them as utils.<module>."""
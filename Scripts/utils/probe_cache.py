@@ -0,0 +1,136 @@
+"""
+Persistent ffprobe cache shared by MovieAnalyzer, CineScan and the Audioconverter.
+
+Every probed file is stored once in a SQLite database, keyed by (path, size, mtime_ns).
+As long as a file is unchanged its ffprobe JSON (-show_streams -show_format) comes
+from the cache instead of a new ffprobe process. Several tools (and several threads)
+may use the cache at the same time: the database runs in WAL mode, every thread has
+its own connection and writes are short IMMEDIATE transactions with a busy timeout.
+When the stored JSON grows beyond MAX_CACHE_BYTES the least recently used entries
+are evicted.
+
+    from utils import probe_cache
+    info = probe_cache.probe(path)   # RuntimeError if ffprobe fails
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+
+CACHE_PATH = os.environ.get("FFPROBE_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ffprobe_cache.db"))
+FFPROBE_PATH = "ffprobe"
+MAX_CACHE_BYTES = 64 * 1024 * 1024  # stored JSON, roughly 10-20 KB per movie
+EVICT_EVERY = 100                   # check the cache size every n stores
+TOUCH_AFTER = 24 * 3600             # refresh last_used on a hit at most once a day (hits stay read-only)
+BUSY_TIMEOUT = 30                   # seconds to wait for another process' write
+
+_local = threading.local()
+_stores = 0
+_stores_lock = threading.Lock()
+
+
+def _connect():
+    """One connection per thread (and per process)"""
+    db = getattr(_local, "db", None)
+    if db is None:
+        db = sqlite3.connect(CACHE_PATH, timeout=BUSY_TIMEOUT, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS probes (
+                path      TEXT PRIMARY KEY,
+                size      INTEGER NOT NULL,
+                mtime_ns  INTEGER NOT NULL,
+                info      TEXT NOT NULL,
+                bytes     INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_probes_last_used ON probes (last_used)")
+        _local.db = db
+    return db
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def probe_cmd(path, ffprobe_path=None):
+    return [ffprobe_path or FFPROBE_PATH, "-v", "error", "-print_format", "json",
+            "-show_format", "-show_streams", str(path)]
+
+def lookup(path, st=None):
+    """Cached ffprobe JSON for path, or None if unknown or the file changed since"""
+    st = st or os.stat(path)
+    key = _key(path)
+    db = _connect()
+    row = db.execute("SELECT size, mtime_ns, info, last_used FROM probes WHERE path = ?", (key,)).fetchone()
+    if not row or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+        return None
+    now = time.time()
+    if now - row[3] > TOUCH_AFTER:
+        try:
+            db.execute("UPDATE probes SET last_used = ? WHERE path = ?", (now, key))
+        except sqlite3.OperationalError:
+            pass  # locked by another writer, try again next time
+    return json.loads(row[2])
+
+def store(path, info, st):
+    """Store info for path. st is the os.stat taken BEFORE probing, so a file that
+    changes while ffprobe runs is simply probed again next time."""
+    global _stores
+    data = json.dumps(info, separators=(",", ":"))
+    db = _connect()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        db.execute("INSERT OR REPLACE INTO probes (path, size, mtime_ns, info, bytes, last_used) "
+                   "VALUES (?, ?, ?, ?, ?, ?)",
+                   (_key(path), st.st_size, st.st_mtime_ns, data, len(data), time.time()))
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+    with _stores_lock:
+        _stores += 1
+        due = _stores % EVICT_EVERY == 1  # first store of a run and every EVICT_EVERY after
+    if due:
+        evict()
+
+def evict(max_bytes=None):
+    """Drop least recently used entries until the stored JSON fits into max_bytes"""
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    db = _connect()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        total = db.execute("SELECT COALESCE(SUM(bytes), 0) FROM probes").fetchone()[0]
+        if total > max_bytes:
+            excess = total - max_bytes
+            freed = 0
+            doomed = []
+            for path, size in db.execute("SELECT path, bytes FROM probes ORDER BY last_used").fetchall():
+                doomed.append((path,))
+                freed += size
+                if freed >= excess:
+                    break
+            db.executemany("DELETE FROM probes WHERE path = ?", doomed)
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+def forget(path):
+    _connect().execute("DELETE FROM probes WHERE path = ?", (_key(path),))
+
+def probe(path, ffprobe_path=None):
+    """ffprobe JSON (streams + format) of path, from the cache if the file is unchanged.
+    Raises RuntimeError if ffprobe fails (failures are not cached)."""
+    st = os.stat(path)
+    info = lookup(path, st)
+    if info is not None:
+        return info
+    res = subprocess.run(probe_cmd(path, ffprobe_path), capture_output=True, text=True)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip() or "ffprobe returned non-zero exit code")
+    info = json.loads(res.stdout)
+    store(path, info, st)
+    return info